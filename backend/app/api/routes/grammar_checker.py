@@ -1,9 +1,18 @@
 from typing import Any
 
-import language_tool_python
 from fastapi import APIRouter
 from pydantic import BaseModel
 
+from backend.app.services.grammar_service.grammar_executor import (
+    get_grammar_executor,
+)
+from backend.app.services.grammar_service.sentence_cache import (
+    GrammarMatch,
+    get_sentence_check_cache,
+)
+from backend.app.services.grammar_service.spell_prefilter import (
+    get_spell_prefilter,
+)
 from backend.app.utils.default_article import default_article
 from backend.app.utils.language_enum import LanguageToolLanguage
 
@@ -17,37 +26,107 @@ class GrammarRequest(BaseModel):
 
 @router.post("/check-grammar")
 async def check_grammar(request: GrammarRequest) -> dict[str, Any]:
-    tool = language_tool_python.LanguageTool(request.language.value)
+    issues = await get_grammar_executor().run(
+        grammar_issues, request.text, request.language
+    )
 
-    matches = tool.check(request.text)
+    return {"issues": issues}
+
+
+class GrammarBatchRequest(BaseModel):
+    # Field name -> text, e.g. {"perex": ..., "engaging_text": ..., "article": ...}
+    texts: dict[str, str]
+    language: LanguageToolLanguage = LanguageToolLanguage.SLOVAK
+
+
+@router.post("/check-grammar/batch")
+async def check_grammar_batch(request: GrammarBatchRequest) -> dict[str, Any]:
+    """Issues and corrected text for every field, all fields checked in one LanguageTool pass"""
+    results = await get_grammar_executor().run(
+        check_fields, request.texts, request.language
+    )
+
+    return {"fields": results}
+
+
+def grammar_issues(
+    text: str, language: LanguageToolLanguage = LanguageToolLanguage.SLOVAK
+) -> list[dict[str, Any]]:
+    return match_issues(get_sentence_check_cache().check(text, language))
+
+
+def check_fields(
+    texts: dict[str, str],
+    language: LanguageToolLanguage = LanguageToolLanguage.SLOVAK,
+) -> dict[str, dict[str, Any]]:
+    matches = get_sentence_check_cache().check_many(list(texts.values()), language)
 
+    return {
+        field: {
+            "issues": match_issues(field_matches),
+            "corrected": apply_corrections(text, field_matches),
+        }
+        for (field, text), field_matches in zip(texts.items(), matches, strict=True)
+    }
+
+
+def match_issues(matches: list[GrammarMatch]) -> list[dict[str, Any]]:
     issues = []
     for match in matches:
         issues.append(
             {
                 "message": match.message,
                 "offset": match.offset,
-                "length": match.errorLength,
+                "length": match.length,
                 "replacements": match.replacements,
-                "rule_id": match.ruleId,
-                "context": {"text": match.context, "offset": match.offsetInContext},
+                "rule_id": match.rule_id,
+                "context": {"text": match.context, "offset": match.context_offset},
             }
         )
 
-    return {"issues": issues}
+    return issues
+
+
+async def correct_text_async(
+    text: str, language: LanguageToolLanguage = LanguageToolLanguage.SLOVAK
+) -> str:
+    """correct_text on the grammar executor, for use from async code"""
+    return await get_grammar_executor().run(correct_text, text, language)
+
+
+async def correct_texts_async(
+    texts: list[str], language: LanguageToolLanguage = LanguageToolLanguage.SLOVAK
+) -> list[str]:
+    """correct_texts on the grammar executor, for use from async code"""
+    return await get_grammar_executor().run(correct_texts, texts, language)
 
 
 def correct_text(
     text: str, language: LanguageToolLanguage = LanguageToolLanguage.SLOVAK
 ) -> str:
-    tool = language_tool_python.LanguageTool(language.value)
-    matches = tool.check(text)
+    matches = get_sentence_check_cache().check(text, language, get_spell_prefilter())
+    return apply_corrections(text, matches)
+
+
+def correct_texts(
+    texts: list[str], language: LanguageToolLanguage = LanguageToolLanguage.SLOVAK
+) -> list[str]:
+    """correct_text for several texts in one LanguageTool pass"""
+    matches = get_sentence_check_cache().check_many(
+        texts, language, get_spell_prefilter()
+    )
+    return [
+        apply_corrections(text, text_matches)
+        for text, text_matches in zip(texts, matches, strict=True)
+    ]
+
 
+def apply_corrections(text: str, matches: list[GrammarMatch]) -> str:
     # Reverse order so that it starts fixing from the back to make sure offsets for the other replacements still fit
-    matches.sort(key=lambda m: m.offset, reverse=True)
+    matches = sorted(matches, key=lambda m: m.offset, reverse=True)
 
     for match in matches:
-        word = text[match.offset : match.offset + match.errorLength]
+        word = text[match.offset : match.offset + match.length]
 
         # Skip corrections for words with capitals (likely names, will fix these incorrectly)
         if not word.islower():
@@ -65,9 +144,7 @@ def correct_text(
                 continue
 
             text = (
-                text[: match.offset]
-                + replacement
-                + text[match.offset + match.errorLength :]
+                text[: match.offset] + replacement + text[match.offset + match.length :]
             )
 
     return text
@@ -1,19 +1,24 @@
 import asyncio
 import os
 import traceback
+from collections.abc import AsyncIterator, Awaitable, Callable
 
 import httpx
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.inmemory import InMemoryBackend
+from pydantic import BaseModel
 
 from backend.app.core.config import settings
 from backend.app.services.ai_service.article_generator import ArticleGenerator
 from backend.app.services.ai_service.response_models import (
     ArticleBodyResponse,
+    ArticleResponse,
     EngagingTextResponse,
     ExtractArticleResponse,
     HeadlineResponse,
+    JobResponse,
     PerexResponse,
     TagsResponse,
 )
@@ -28,7 +33,13 @@ from backend.app.utils.default_article import (
     default_topic,
 )
 from backend.app.utils.graph_helper import clean_graph_data, generate_article_data
-from backend.app.utils.scraping_cache_functions import cache_or_scrape
+from backend.app.utils.job_pool import Job, JobPoolFullError, get_job_pool
+from backend.app.utils.scraping_cache_functions import (
+    cache_or_scrape,
+    get_storm_cache,
+    normalize_url,
+)
+from backend.app.utils.sse import SSE_HEADERS, sse_event
 from backend.app.utils.url_getter import extract_reference_urls
 
 router = APIRouter()
@@ -39,6 +50,8 @@ async def extract_article(
     url: str = default_article_url,
     selected_topic: str = default_topic,
     storm: bool = False,
+    bypass_cache: bool = False,
+    on_stage_done: Callable[[str, BaseModel], Awaitable[None]] | None = None,
 ) -> ExtractArticleResponse:
     try:
         scraped_article = await cache_or_scrape(url, default_article_url)
@@ -47,11 +60,12 @@ async def extract_article(
         if storm:
             storm_article = await storm_cache_retrieve(selected_topic, url)
 
-        ai_service = ArticleGenerator()
+        ai_service = ArticleGenerator(bypass_cache=bypass_cache)
         article = await ai_service.generate_article(
             scraped_content=scraped_article,
             selected_topic=selected_topic,
             storm_article=storm_article,
+            on_stage_done=on_stage_done,
         )
 
         # Get list of storm article reference url to send to frontend
@@ -60,26 +74,89 @@ async def extract_article(
         # Clean graph data early
         article = clean_graph_data(article)
 
-        # Construct article_data entity to save on db
-        article_data = generate_article_data(url, article, selected_topic)
+        article_id = await save_article(url, article, selected_topic)
+        return ExtractArticleResponse(
+            id=article_id, article=article, storm_urls=storm_urls
+        )
 
-        verify_ssl = settings.ENVIRONMENT != "development"
-        async with httpx.AsyncClient(verify=verify_ssl) as client:
-            response = await client.post(
-                "https://api.wraite.news/save_article/", json=article_data
-            )
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e))
 
-        if not response.is_success:
-            raise HTTPException(status_code=response.status_code, detail=response.text)
 
-        response_data = response.json()
-        return ExtractArticleResponse(
-            id=response_data.get("id"), article=article, storm_urls=storm_urls
+async def save_article(url: str, article: ArticleResponse, selected_topic: str) -> int:
+    # Construct article_data entity to save on db
+    article_data = generate_article_data(url, article, selected_topic)
+
+    verify_ssl = settings.ENVIRONMENT != "development"
+    async with httpx.AsyncClient(verify=verify_ssl) as client:
+        response = await client.post(
+            "https://api.wraite.news/save_article/", json=article_data
         )
 
+    if not response.is_success:
+        raise HTTPException(status_code=response.status_code, detail=response.text)
+
+    return response.json().get("id")
+
+
+def stage_payload(stage: str, result: BaseModel) -> dict:
+    if stage == "graph":
+        # Cleaned on a copy, the whole article is cleaned once generation is done
+        result = clean_graph_data(result.model_copy(deep=True))
+    return result.model_dump(exclude={"chain_of_thought"})
+
+
+async def stream_extract_article(
+    url: str = default_article_url,
+    selected_topic: str = default_topic,
+    storm: bool = False,
+    bypass_cache: bool = False,
+) -> AsyncIterator[str]:
+    """Same pipeline as extract_article, but every field is sent as a separate SSE event as soon as its stage
+    finishes. The last event is either `done` with the saved article id or `error`"""
+    generation = None
+    try:
+        scraped_article = await cache_or_scrape(url, default_article_url)
+
+        storm_article = None
+        if storm:
+            storm_article = await storm_cache_retrieve(selected_topic, url)
+            yield sse_event("storm_urls", extract_reference_urls(storm_article))
+
+        finished_stages: asyncio.Queue = asyncio.Queue()
+
+        async def on_stage_done(stage: str, result: BaseModel) -> None:
+            await finished_stages.put((stage, result))
+
+        ai_service = ArticleGenerator(bypass_cache=bypass_cache)
+        generation = asyncio.create_task(
+            ai_service.generate_article(
+                scraped_content=scraped_article,
+                selected_topic=selected_topic,
+                storm_article=storm_article,
+                on_stage_done=on_stage_done,
+            )
+        )
+        generation.add_done_callback(lambda _: finished_stages.put_nowait(None))
+
+        while (finished := await finished_stages.get()) is not None:
+            stage, result = finished
+            yield sse_event(stage, stage_payload(stage, result))
+
+        article = clean_graph_data(await generation)
+        article_id = await save_article(url, article, selected_topic)
+        yield sse_event("done", {"id": article_id})
+
     except Exception as e:
         traceback.print_exc()
-        raise HTTPException(status_code=400, detail=str(e))
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        yield sse_event("error", {"detail": detail})
+
+    finally:
+        # The client went away before the article was finished
+        if generation is not None and not generation.done():
+            generation.cancel()
 
 
 if settings.ENVIRONMENT == "development":
@@ -89,8 +166,9 @@ if settings.ENVIRONMENT == "development":
         url: str = default_article_url,
         selected_topic: str = default_topic,
         storm: bool = False,
+        bypass_cache: bool = False,
     ) -> ExtractArticleResponse:
-        return await extract_article(url, selected_topic, storm)
+        return await extract_article(url, selected_topic, storm, bypass_cache)
 
 
 @router.post("/article/generate", response_model=ExtractArticleResponse)
@@ -102,12 +180,124 @@ async def extract_article_post(
         url = request_body.get("url", default_article_url)
         selected_topic = request_body.get("selected_topic", default_topic)
         storm = request_body.get("storm", False)
-        return await extract_article(url, selected_topic, storm)
+        bypass_cache = request_body.get("bypass_cache", False)
+        return await extract_article(url, selected_topic, storm, bypass_cache)
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+if settings.ENVIRONMENT == "development":
+
+    @router.get("/article/generate/stream")
+    async def stream_extract_article_get(
+        url: str = default_article_url,
+        selected_topic: str = default_topic,
+        storm: bool = False,
+        bypass_cache: bool = False,
+    ) -> StreamingResponse:
+        return StreamingResponse(
+            stream_extract_article(url, selected_topic, storm, bypass_cache),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
+        )
+
+
+@router.post("/article/generate/stream")
+async def stream_extract_article_post(
+    request: Request,
+) -> StreamingResponse:
+    try:
+        request_body = await request.json()
+        url = request_body.get("url", default_article_url)
+        selected_topic = request_body.get("selected_topic", default_topic)
+        storm = request_body.get("storm", False)
+        bypass_cache = request_body.get("bypass_cache", False)
+        return StreamingResponse(
+            stream_extract_article(url, selected_topic, storm, bypass_cache),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def submit_extract_article_job(
+    url: str = default_article_url,
+    selected_topic: str = default_topic,
+    storm: bool = False,
+    bypass_cache: bool = False,
+) -> JobResponse:
+    """Queue extract_article on the job pool and return at once. Submitting an article that is already being
+    generated returns the running job, one that bypasses the cache is only coalesced with other bypassing ones
+    """
+
+    async def run(job: Job) -> ExtractArticleResponse:
+        async def on_stage_done(stage: str, result: BaseModel) -> None:
+            job.partial[stage] = stage_payload(stage, result)
+
+        return await extract_article(
+            url, selected_topic, storm, bypass_cache, on_stage_done=on_stage_done
+        )
+
+    try:
+        job = get_job_pool().submit(
+            f"{url}|{selected_topic}|{storm}|{bypass_cache}", run
+        )
+    except JobPoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return job_response(job)
+
+
+def job_response(job: Job) -> JobResponse:
+    return JobResponse(
+        id=job.id,
+        status=job.status.value,
+        partial=job.partial,
+        result=job.result,
+        error=job.error,
+    )
+
+
+if settings.ENVIRONMENT == "development":
+
+    @router.get("/article/generate/jobs", response_model=JobResponse)
+    async def submit_extract_article_job_get(
+        url: str = default_article_url,
+        selected_topic: str = default_topic,
+        storm: bool = False,
+        bypass_cache: bool = False,
+    ) -> JobResponse:
+        return submit_extract_article_job(url, selected_topic, storm, bypass_cache)
+
+
+@router.post("/article/generate/jobs", response_model=JobResponse)
+async def submit_extract_article_job_post(
+    request: Request,
+) -> JobResponse:
+    try:
+        request_body = await request.json()
+        url = request_body.get("url", default_article_url)
+        selected_topic = request_body.get("selected_topic", default_topic)
+        storm = request_body.get("storm", False)
+        bypass_cache = request_body.get("bypass_cache", False)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return submit_extract_article_job(url, selected_topic, storm, bypass_cache)
+
+
+@router.get("/article/generate/jobs/{job_id}", response_model=JobResponse)
+async def get_extract_article_job(job_id: str) -> JobResponse:
+    job = get_job_pool().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    return job_response(job)
+
+
 # endregion
 
 
@@ -116,11 +306,12 @@ async def regenerate_headlines(
     url: str = default_article_url,
     selected_topic: str = default_topic,
     old_headlines: list[str] = default_headlines,
+    bypass_cache: bool = False,
 ) -> HeadlineResponse:
     try:
         scraped_article = await cache_or_scrape(url, default_article_url)
 
-        ai_service = ArticleGenerator()
+        ai_service = ArticleGenerator(bypass_cache=bypass_cache)
         new_headlines = await ai_service.generate_headlines(
             scraped_content=scraped_article,
             selected_topic=selected_topic,
@@ -139,8 +330,11 @@ if settings.ENVIRONMENT == "development":
         url: str = default_article_url,
         selected_topic: str = default_topic,
         old_headlines: list[str] = default_headlines,
+        bypass_cache: bool = False,
     ) -> HeadlineResponse:
-        return await regenerate_headlines(url, selected_topic, old_headlines)
+        return await regenerate_headlines(
+            url, selected_topic, old_headlines, bypass_cache
+        )
 
 
 @router.post("/regenerate/headlines", response_model=HeadlineResponse)
@@ -152,8 +346,11 @@ async def regenerate_headlines_post(
         url = request_body.get("url", default_article_url)
         selected_topic = request_body.get("selected_topic", default_topic)
         old_headlines = request_body.get("old_headlines")
+        bypass_cache = request_body.get("bypass_cache", False)
 
-        return await regenerate_headlines(url, selected_topic, old_headlines)
+        return await regenerate_headlines(
+            url, selected_topic, old_headlines, bypass_cache
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -168,6 +365,7 @@ async def regenerate_engaging_text(
     old_engaging_text: str = default_engaging_text,
     current_headline: str = default_headline,
     storm: bool = False,
+    bypass_cache: bool = False,
 ) -> EngagingTextResponse:
     try:
         scraped_article = await cache_or_scrape(url, default_article_url)
@@ -176,7 +374,7 @@ async def regenerate_engaging_text(
         if storm:
             storm_article = await storm_cache_retrieve(selected_topic, url)
 
-        ai_service = ArticleGenerator()
+        ai_service = ArticleGenerator(bypass_cache=bypass_cache)
         new_engaging_text = await ai_service.generate_engaging_text(
             scraped_content=scraped_article,
             selected_topic=selected_topic,
@@ -200,9 +398,15 @@ if settings.ENVIRONMENT == "development":
         old_engaging_text: str = default_engaging_text,
         current_headline: str = default_headline,
         storm: bool = False,
+        bypass_cache: bool = False,
     ) -> EngagingTextResponse:
         return await regenerate_engaging_text(
-            url, selected_topic, old_engaging_text, current_headline, storm
+            url,
+            selected_topic,
+            old_engaging_text,
+            current_headline,
+            storm,
+            bypass_cache,
         )
 
 
@@ -217,9 +421,15 @@ async def regenerate_engaging_text_post(
         old_engaging_text = request_body.get("old_engaging_text", default_engaging_text)
         current_headline = request_body.get("current_headline", default_headline)
         storm = request_body.get("storm", False)
+        bypass_cache = request_body.get("bypass_cache", False)
 
         return await regenerate_engaging_text(
-            url, selected_topic, old_engaging_text, current_headline, storm
+            url,
+            selected_topic,
+            old_engaging_text,
+            current_headline,
+            storm,
+            bypass_cache,
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -235,6 +445,7 @@ async def regenerate_perex(
     old_perex: str = default_perex,
     current_headline: str = default_headline,
     storm: bool = False,
+    bypass_cache: bool = False,
 ) -> PerexResponse:
     try:
         scraped_article = await cache_or_scrape(url, default_article_url)
@@ -243,7 +454,7 @@ async def regenerate_perex(
         if storm:
             storm_article = await storm_cache_retrieve(selected_topic, url)
 
-        ai_service = ArticleGenerator()
+        ai_service = ArticleGenerator(bypass_cache=bypass_cache)
         new_perex = await ai_service.generate_perex(
             scraped_content=scraped_article,
             selected_topic=selected_topic,
@@ -267,9 +478,10 @@ if settings.ENVIRONMENT == "development":
         old_perex: str = default_perex,
         current_headline: str = default_headline,
         storm: bool = False,
+        bypass_cache: bool = False,
     ) -> PerexResponse:
         return await regenerate_perex(
-            url, selected_topic, old_perex, current_headline, storm
+            url, selected_topic, old_perex, current_headline, storm, bypass_cache
         )
 
 
@@ -284,9 +496,10 @@ async def regenerate_perex_post(
         old_perex = request_body.get("old_perex", default_perex)
         current_headline = request_body.get("current_headline", default_headline)
         storm = request_body.get("storm", False)
+        bypass_cache = request_body.get("bypass_cache", False)
 
         return await regenerate_perex(
-            url, selected_topic, old_perex, current_headline, storm
+            url, selected_topic, old_perex, current_headline, storm, bypass_cache
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -302,6 +515,7 @@ async def regenerate_article_body(
     old_article_body: str = default_article,
     current_headline: str = default_headline,
     storm: bool = False,
+    bypass_cache: bool = False,
 ) -> ArticleBodyResponse:
     try:
         scraped_article = await cache_or_scrape(url, default_article)
@@ -310,7 +524,7 @@ async def regenerate_article_body(
         if storm:
             storm_article = await storm_cache_retrieve(selected_topic, url)
 
-        ai_service = ArticleGenerator()
+        ai_service = ArticleGenerator(bypass_cache=bypass_cache)
         new_article_body = await ai_service.generate_article_body(
             scraped_content=scraped_article,
             selected_topic=selected_topic,
@@ -334,9 +548,10 @@ if settings.ENVIRONMENT == "development":
         old_article_body: str = default_article,
         current_headline: str = default_headline,
         storm: bool = False,
+        bypass_cache: bool = False,
     ) -> ArticleBodyResponse:
         return await regenerate_article_body(
-            url, selected_topic, old_article_body, current_headline, storm
+            url, selected_topic, old_article_body, current_headline, storm, bypass_cache
         )
 
 
@@ -351,10 +566,102 @@ async def regenerate_article_body_post(
         old_article_body = request_body.get("old_article_body", default_article)
         current_headline = request_body.get("current_headline", default_headline)
         storm = request_body.get("storm", False)
+        bypass_cache = request_body.get("bypass_cache", False)
 
         return await regenerate_article_body(
-            url, selected_topic, old_article_body, current_headline, storm
+            url, selected_topic, old_article_body, current_headline, storm, bypass_cache
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def stream_regenerate_article_body(
+    url: str = default_article_url,
+    selected_topic: str = default_topic,
+    old_article_body: str = default_article,
+    current_headline: str = default_headline,
+    storm: bool = False,
+    bypass_cache: bool = False,
+) -> AsyncIterator[str]:
+    """Same as regenerate_article_body, but the text is sent in `token` events as the model writes it. The
+    grammar-corrected body follows in an `article` event that replaces the streamed text, or `error`
+    """
+    try:
+        scraped_article = await cache_or_scrape(url, default_article)
+
+        storm_article = None
+        if storm:
+            storm_article = await storm_cache_retrieve(selected_topic, url)
+
+        ai_service = ArticleGenerator(bypass_cache=bypass_cache)
+        async for value in ai_service.stream_article_body(
+            scraped_content=scraped_article,
+            selected_topic=selected_topic,
+            old_article=old_article_body,
+            current_headline=current_headline,
+            storm_article=storm_article,
+        ):
+            if isinstance(value, ArticleBodyResponse):
+                yield sse_event("article", value.model_dump())
+            else:
+                yield sse_event("token", {"text": value})
+
+    except Exception as e:
+        traceback.print_exc()
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        yield sse_event("error", {"detail": detail})
+
+
+if settings.ENVIRONMENT == "development":
+
+    @router.get("/regenerate/articlebody/stream")
+    async def stream_regenerate_article_body_get(
+        url: str = default_article_url,
+        selected_topic: str = default_topic,
+        old_article_body: str = default_article,
+        current_headline: str = default_headline,
+        storm: bool = False,
+        bypass_cache: bool = False,
+    ) -> StreamingResponse:
+        return StreamingResponse(
+            stream_regenerate_article_body(
+                url,
+                selected_topic,
+                old_article_body,
+                current_headline,
+                storm,
+                bypass_cache,
+            ),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
         )
+
+
+@router.post("/regenerate/articlebody/stream")
+async def stream_regenerate_article_body_post(
+    request: Request,
+) -> StreamingResponse:
+    try:
+        request_body = await request.json()
+        url = request_body.get("url", default_article_url)
+        selected_topic = request_body.get("selected_topic", default_topic)
+        old_article_body = request_body.get("old_article_body", default_article)
+        current_headline = request_body.get("current_headline", default_headline)
+        storm = request_body.get("storm", False)
+        bypass_cache = request_body.get("bypass_cache", False)
+        return StreamingResponse(
+            stream_regenerate_article_body(
+                url,
+                selected_topic,
+                old_article_body,
+                current_headline,
+                storm,
+                bypass_cache,
+            ),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
+        )
+
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -370,11 +677,12 @@ async def regenerate_tags(
     old_tags: list[str] = default_tags,
     current_headline: str = default_headline,
     current_article: str = default_article,
+    bypass_cache: bool = False,
 ) -> TagsResponse:
     try:
         scraped_article = await cache_or_scrape(url, default_article)
 
-        ai_service = ArticleGenerator()
+        ai_service = ArticleGenerator(bypass_cache=bypass_cache)
         new_tags = await ai_service.generate_tags(
             scraped_content=scraped_article,
             selected_topic=selected_topic,
@@ -398,9 +706,15 @@ if settings.ENVIRONMENT == "development":
         old_tags: list[str] = default_tags,
         current_headline: str = default_headline,
         current_article: str = default_article,
+        bypass_cache: bool = False,
     ) -> TagsResponse:
         return await regenerate_tags(
-            url, selected_topic, old_tags, current_headline, current_article
+            url,
+            selected_topic,
+            old_tags,
+            current_headline,
+            current_article,
+            bypass_cache,
         )
 
 
@@ -415,9 +729,15 @@ async def regenerate_tags_post(
         old_tags = request_body.get("old_tags", default_tags)
         current_headline = request_body.get("current_headline", default_headline)
         current_article = request_body.get("current_article", default_article)
+        bypass_cache = request_body.get("bypass_cache", False)
 
         return await regenerate_tags(
-            url, selected_topic, old_tags, current_headline, current_article
+            url,
+            selected_topic,
+            old_tags,
+            current_headline,
+            current_article,
+            bypass_cache,
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -457,18 +777,13 @@ async def call_storm_microservice_generate(
 
 
 async def storm_cache_retrieve(selected_topic: str, url: str) -> str:
-    cache_key = f"storm_article:{selected_topic}:{url}"
-    cached_content = await FastAPICache.get_backend().get(cache_key)
+    cache_key = f"storm_article:{selected_topic}:{normalize_url(url)}"
 
-    if not cached_content:
+    async def generate() -> str:
         storm_article = await call_storm_microservice_generate(selected_topic, url)
-        parsed_storm_article = storm_article["result"]
-        await FastAPICache.get_backend().set(
-            cache_key, parsed_storm_article, expire=3600
-        )
-    else:
-        parsed_storm_article = cached_content
-    return parsed_storm_article
+        return storm_article["result"]
+
+    return await get_storm_cache().get(cache_key, generate)
 
 
 # endregion
@@ -1,14 +1,13 @@
 from urllib.parse import urlparse
 
 from fastapi import APIRouter, HTTPException, Request
-from fastapi_cache import FastAPICache
 from starlette.responses import JSONResponse
 
 from backend.app.core.config import settings
 from backend.app.services.ai_service.article_generator import ArticleGenerator
 from backend.app.services.ai_service.response_models import TopicsResponse
-from backend.app.services.scraping_service.jina_scraper import jina_scrape
 from backend.app.utils.default_article import default_article, default_article_url
+from backend.app.utils.scraping_cache_functions import cache_or_scrape_raw
 
 router = APIRouter()
 
@@ -61,24 +60,11 @@ async def extract_topics(
     url: str = default_article,
 ) -> TopicsResponse:
     try:
-        cache_key = f"article:{url}"
-        default_cache_key = f"article:{default_article_url}"
-        cached_content = await FastAPICache.get_backend().get(cache_key)
-
         # Temporary solution until scraper works again
-        if not cached_content:
-            if url == default_article:
-                scraped_content = url
-                await FastAPICache.get_backend().set(
-                    default_cache_key, scraped_content, expire=3600
-                )
-            else:
-                scraped_content = await jina_scrape(url)
-                await FastAPICache.get_backend().set(
-                    cache_key, scraped_content, expire=3600
-                )
+        if url == default_article:
+            scraped_content = url
         else:
-            scraped_content = cached_content
+            scraped_content = await cache_or_scrape_raw(url, default_article_url)
 
         ai_service = ArticleGenerator()
         generated_topics = await ai_service.generate_topics(scraped_content)
@@ -1,5 +1,8 @@
 import os
+import tempfile
+from typing import Literal
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,6 +15,75 @@ class Settings(BaseSettings):
     ENVIRONMENT: str
 
     SCRAPER: str = "jina"  # can be "playwright" or "jina"
+    # Scraped content is cut to this many tokens after the boilerplate is stripped, None keeps all of it
+    SCRAPED_CONTENT_TOKEN_BUDGET: int | None = 6000
+    # Scraped pages are kept in memory and in this SQLite file, so a restart does not scrape everything again.
+    # None keeps them in memory only
+    SCRAPE_CACHE_PATH: str | None = os.path.join(
+        tempfile.gettempdir(), "news-aigency", "scrapes.db"
+    )
+    # After the soft TTL a cached page is still served but scraped again in the background, after the hard TTL
+    # the next request waits for the scrape
+    SCRAPE_CACHE_SOFT_TTL: int = 3600
+    SCRAPE_CACHE_TTL: int = 86400
+    # The same for STORM articles, kept in the scrape cache file
+    STORM_CACHE_SOFT_TTL: int = 3600
+    STORM_CACHE_TTL: int = 86400
+    SCRAPE_CACHE_MAX_ENTRIES: int = 256
+    # Shared HTTP session of the jina scraper, timeouts in seconds
+    SCRAPE_CONNECT_TIMEOUT: float = 10
+    SCRAPE_READ_TIMEOUT: float = 60
+    SCRAPE_CONNECTIONS_PER_HOST: int = 10
+    # Chromium processes shared by the playwright scraper, each relaunched after this many pages
+    BROWSER_POOL_SIZE: int = 2
+    BROWSER_PAGES_PER_BROWSER: int = 50
+    # BeautifulSoup parser for scraped pages, "auto" picks lxml when it is installed and html.parser otherwise
+    HTML_PARSER: str = "auto"  # can be "auto", "lxml" or "html.parser"
+
+    # Background article generation jobs
+    JOB_WORKERS: int = 4
+    JOB_QUEUE_SIZE: int = 100
+    JOB_RESULT_TTL: int = 3600
+
+    # LanguageTool instances kept running per language for grammar correction, at least GRAMMAR_SHARD_WORKERS
+    LANGUAGE_TOOL_POOL_SIZE: int = 1
+    # "local" starts a LanguageTool server in every process, "shared" starts one for all processes on the machine
+    # (or attaches to it), "remote" uses the server at LANGUAGE_TOOL_SERVER_URL, which is then required. The last
+    # two fall back to "local" when the server cannot be reached or started
+    LANGUAGE_TOOL_MODE: Literal["local", "shared", "remote"] = "local"
+    LANGUAGE_TOOL_SERVER_URL: str | None = None
+    # Where the "shared" mode keeps the server's URL and its lock, a temp directory when unset
+    LANGUAGE_TOOL_STATE_DIR: str | None = None
+    # Threads running grammar checks off the event loop, and how many more checks may wait for them
+    GRAMMAR_WORKERS: int = 4
+    GRAMMAR_QUEUE_SIZE: int = 64
+    # Sentences whose LanguageTool matches are kept, so re-checking an edited text only checks the changes
+    GRAMMAR_CACHE_MAX_SENTENCES: int = 10000
+    # Unchecked text longer than this is split into up to GRAMMAR_SHARD_WORKERS shards checked in parallel, each
+    # on its own pooled LanguageTool instance. The pool grows to that many instances per language, in the "local"
+    # mode every one of them is a LanguageTool server of its own, so sharding is off (1) by default
+    GRAMMAR_SHARD_CHARS: int = 2000
+    GRAMMAR_SHARD_WORKERS: int = 1
+    # Skip LanguageTool in correct_text for sentences whose lowercase words are all known, the words come from
+    # SPELL_DICTIONARY_DIR/{sk,en-US}.dic (or hunspell's sk_SK.dic, en_US.dic) and from sentences LanguageTool
+    # found no issue in
+    SPELL_PREFILTER: bool = False
+    SPELL_DICTIONARY_DIR: str | None = None
+
+    # Load the optimized_signatures/*.json states into the generation programs
+    USE_OPTIMIZED_SIGNATURES: bool = False
+
+    # Send the source content shared by all calls for one article first in every prompt, so the provider can
+    # serve it from its prompt prefix cache. Off until the rewritten prompts are evaluated with the LLM judge
+    PREFIX_CACHE_PROMPT_LAYOUT: bool = False
+
+    # Generate headlines, perex, engaging text and tags of a new article with one LLM call instead of four
+    SINGLE_CALL_SHORT_FIELDS: bool = False
+
+    # LLM response cache, the on-disk tier is only used when a path is set
+    LLM_CACHE_MAX_ENTRIES: int = 512
+    LLM_CACHE_TTL: int = 86400
+    LLM_CACHE_PATH: str | None = None
 
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(__file__), ".env"), extra="allow"
@@ -23,5 +95,13 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str = "localhost"
     POSTGRES_PORT: str = "15432"
 
+    @model_validator(mode="after")
+    def check_language_tool_server(self) -> "Settings":
+        if self.LANGUAGE_TOOL_MODE == "remote" and not self.LANGUAGE_TOOL_SERVER_URL:
+            raise ValueError(
+                'LANGUAGE_TOOL_SERVER_URL is required when LANGUAGE_TOOL_MODE is "remote"'
+            )
+        return self
+
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -7,9 +7,52 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.
 from urllib.parse import urlparse
 from urllib.request import Request, urlopen
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 
 from backend.app.services.ai_service.response_models import ArticleResponse
+from backend.app.services.scraping_service.html_parser import (
+    AnyOf,
+    has_class,
+    parse_html,
+)
+
+PRAVDA_STRAINER = AnyOf(
+    SoupStrainer("h1", attrs={"itemprop": "headline"}),
+    SoupStrainer("p", attrs={"itemprop": "description"}),
+    SoupStrainer("div", attrs={"itemprop": "articleBody"}),
+    SoupStrainer("div", attrs={"class": has_class("article-detail-tags")}),
+)
+
+# Per site, just the nodes its converter reads. Everything else on the page is skipped while parsing
+SITE_STRAINERS = {
+    "uzitocna.pravda.sk": PRAVDA_STRAINER,
+    "ekonomika.pravda.sk": PRAVDA_STRAINER,
+    "index.sme.sk": AnyOf(
+        SoupStrainer("h1", attrs={"class": has_class("js-article-title")}),
+        SoupStrainer("p", attrs={"class": has_class("perex")}),
+        SoupStrainer("article", attrs={"class": has_class("js-remp-article-data")}),
+    ),
+    "e.dennikn.sk": AnyOf(
+        SoupStrainer("h1", attrs={"class": has_class("n3_single_title")}),
+        SoupStrainer("div", attrs={"class": has_class("entry-content")}),
+    ),
+    "www.trend.sk": AnyOf(
+        SoupStrainer("h1", attrs={"data-don": "article_title"}),
+        SoupStrainer("p", attrs={"data-don": "article_perex"}),
+        SoupStrainer("div", attrs={"data-don": "article_body"}),
+        SoupStrainer("ul", attrs={"data-itm": "related_topics"}),
+    ),
+    "www.teraz.sk": AnyOf(
+        SoupStrainer("h1", attrs={"class": has_class("articleTitle")}),
+        SoupStrainer("p", attrs={"class": has_class("articlePerex")}),
+        SoupStrainer("div", attrs={"class": has_class("articleMain")}),
+    ),
+    "www.forbes.sk": AnyOf(
+        SoupStrainer("h1", attrs={"class": has_class("heading")}),
+        SoupStrainer("div", attrs={"class": has_class("gutenberg-content")}),
+        SoupStrainer("a", attrs={"class": has_class("term__name")}),
+    ),
+}
 
 
 def create_response_json(
@@ -39,14 +82,18 @@ def clean_unicode(text: str) -> str:
     return text
 
 
-def fetch_html(url: str) -> BeautifulSoup:
+def download_html(url: str) -> str:
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36"
     }
     req = Request(url, headers=headers)
 
     with urlopen(req) as response:
-        return BeautifulSoup(response.read().decode("utf-8"), "html.parser")
+        return response.read().decode("utf-8")
+
+
+def fetch_html(url: str, only: SoupStrainer | None = None) -> BeautifulSoup:
+    return parse_html(download_html(url), only)
 
 
 def pravda_to_article_response(soup: BeautifulSoup) -> ArticleResponse:
@@ -139,7 +186,8 @@ def teraz_to_article_response(soup: BeautifulSoup) -> ArticleResponse:
     )
     article_body = soup.find("div", attrs={"class": "articleMain"})
     article = article_body.find("div").get_text()
-    article = article.replace("\n\r\n", " ").strip()
+    # lxml reads "\r\n" as "\n", html.parser keeps it
+    article = article.replace("\r\n", "\n").replace("\n\n", " ").strip()
     tags = ["N/A"]
 
     return create_response_json(headlines, engaging_text, article, tags)
@@ -165,7 +213,7 @@ def forbes_to_article_response(soup: BeautifulSoup) -> ArticleResponse:
 
 def check_origin_url(url: str) -> ArticleResponse:
     parsed_url = urlparse(url)
-    soup = fetch_html(url)
+    soup = fetch_html(url, SITE_STRAINERS.get(parsed_url.hostname))
 
     if parsed_url.hostname in ["uzitocna.pravda.sk", "ekonomika.pravda.sk"]:
         return pravda_to_article_response(soup)
@@ -7,6 +7,7 @@ import pandas as pd
 from backend.app.iitsrc.article_response_converter import check_origin_url
 from backend.app.iitsrc.dspy_llm_judge import llm_compare_strings
 from backend.app.services.ai_service.article_generator import ArticleGenerator
+from backend.app.services.ai_service.lm_governor import Priority
 from backend.app.services.scraping_service.jina_scraper import jina_scrape
 
 def generate_original_article_csv() -> None:
@@ -57,7 +58,7 @@ async def generate_generated_article_csv() -> None:
     file_path = "articles.xlsx"
     output_csv = "generated_articles.csv"
 
-    llm_service = ArticleGenerator()
+    llm_service = ArticleGenerator(priority=Priority.BATCH)
     xls = pd.ExcelFile(file_path)
 
     with open(output_csv, mode="w", newline="", encoding="utf-8") as file:
@@ -0,0 +1,111 @@
+import os
+import time
+import tracemalloc
+from collections.abc import Callable
+from urllib.parse import urlparse
+
+import pandas as pd
+from bs4 import BeautifulSoup, SoupStrainer
+
+from backend.app.iitsrc.article_response_converter import (
+    SITE_STRAINERS,
+    dennikn_to_article_response,
+    download_html,
+    forbes_to_article_response,
+    pravda_to_article_response,
+    sme_to_article_response,
+    teraz_to_article_response,
+    trend_to_article_response,
+)
+from backend.app.services.scraping_service.html_parser import html_parser_name
+from backend.app.services.scraping_service.playwright_scraper import (
+    PUBLICATION_STRAINER,
+    publication_markdown,
+)
+from backend.app.utils.default_article import default_article_url
+
+ARTICLES_XLSX = os.path.join(os.path.dirname(__file__), "articles.xlsx")
+SAVED_PAGES_DIR = os.path.join(os.path.dirname(__file__), "saved_pages")
+
+STATISTICS_HOST = urlparse(default_article_url).hostname
+EXTRACTORS: dict[str, Callable[[BeautifulSoup], object]] = {
+    "uzitocna.pravda.sk": pravda_to_article_response,
+    "ekonomika.pravda.sk": pravda_to_article_response,
+    "index.sme.sk": sme_to_article_response,
+    "e.dennikn.sk": dennikn_to_article_response,
+    "www.trend.sk": trend_to_article_response,
+    "www.teraz.sk": teraz_to_article_response,
+    "www.forbes.sk": forbes_to_article_response,
+    STATISTICS_HOST: publication_markdown,
+}
+STRAINERS = {**SITE_STRAINERS, STATISTICS_HOST: PUBLICATION_STRAINER}
+
+
+def save_pages() -> dict[str, str]:
+    """One page per site: the first article of each news site in articles.xlsx and the default statistics.sk
+    publication, or a page saved by hand for a site that is not in the sheet. Pages are downloaded once and read
+    from SAVED_PAGES_DIR afterwards, a site that cannot be downloaded is left out"""
+    urls = {STATISTICS_HOST: default_article_url}
+    for url in pd.read_excel(ARTICLES_XLSX).iloc[:, 0].tolist():
+        urls.setdefault(urlparse(url).hostname, url)
+
+    os.makedirs(SAVED_PAGES_DIR, exist_ok=True)
+    pages = {}
+    for host in EXTRACTORS:
+        path = os.path.join(SAVED_PAGES_DIR, f"{host}.html")
+        if not os.path.exists(path):
+            if host not in urls:
+                continue
+            try:
+                html = download_html(urls[host])
+            except OSError as e:
+                print(f"Skipping {host}, it could not be downloaded: {e}")
+                continue
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(html)
+        with open(path, encoding="utf-8") as file:
+            pages[host] = file.read()
+    return pages
+
+
+def measure(
+    html: str, parser: str, only: SoupStrainer | None, repeats: int
+) -> tuple[BeautifulSoup, float, int]:
+    """Seconds per parse and the peak of memory allocated while parsing, tree included. BeautifulSoup drives lxml
+    through its parser target callbacks, the tree is made of Python objects with either parser
+    """
+    start_time = time.perf_counter()
+    for _ in range(repeats):
+        BeautifulSoup(html, parser, parse_only=only)
+    seconds = (time.perf_counter() - start_time) / repeats
+
+    tracemalloc.start()
+    soup = BeautifulSoup(html, parser, parse_only=only)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return soup, seconds, peak
+
+
+def benchmark(repeats: int = 10) -> None:
+    """Parse every saved page with html.parser as scraping did before (the whole page) and with the configured
+    parser restricted to the nodes that are read, and check that both extract the same article
+    """
+    parser = html_parser_name()
+    print(f"{'site':<22}{'html.parser, full':>26}{f'{parser}, partial':>26}")
+    for host, html in save_pages().items():
+        full, full_seconds, full_peak = measure(html, "html.parser", None, repeats)
+        partial, partial_seconds, partial_peak = measure(
+            html, parser, STRAINERS[host], repeats
+        )
+        extract = EXTRACTORS[host]
+        same = "" if extract(full) == extract(partial) else "  EXTRACTION DIFFERS"
+        print(
+            f"{host:<22}"
+            f"{full_seconds * 1000:>10.1f} ms {full_peak / 2**20:>8.2f} MiB"
+            f"{partial_seconds * 1000:>10.1f} ms {partial_peak / 2**20:>8.2f} MiB"
+            f"  ({full_seconds / partial_seconds:.1f}x){same}"
+        )
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import time
+from collections import Counter
+
+import pandas as pd
+
+from backend.app.services.ai_service.article_generator import ArticleGenerator
+
+ORIGINAL_ARTICLES_CSV = os.path.join(os.path.dirname(__file__), "original_articles.csv")
+
+
+def count_tokens(history: list[dict], known_entries: set[str]) -> Counter:
+    """Sum the token usage of the LM history entries that are not in known_entries"""
+    tokens: Counter = Counter()
+    for entry in history:
+        if entry["uuid"] in known_entries:
+            continue
+        known_entries.add(entry["uuid"])
+        tokens["calls"] += 1
+        tokens["prompt_tokens"] += entry["usage"].get("prompt_tokens", 0)
+        tokens["completion_tokens"] += entry["usage"].get("completion_tokens", 0)
+    return tokens
+
+
+async def per_field(
+    generator: ArticleGenerator, scraped_content: str, selected_topic: str
+) -> None:
+    # Same as the stages of generate_article, the tags get the source article in place of the generated body
+    await asyncio.gather(
+        generator.generate_headlines(
+            scraped_content=scraped_content, selected_topic=selected_topic
+        ),
+        generator.generate_perex(
+            scraped_content=scraped_content,
+            selected_topic=selected_topic,
+            current_headline=None,
+        ),
+        generator.generate_engaging_text(
+            scraped_content=scraped_content,
+            selected_topic=selected_topic,
+            current_headline=None,
+        ),
+        generator.generate_tags(
+            scraped_content=scraped_content,
+            selected_topic=selected_topic,
+            current_headline=None,
+            current_article=scraped_content,
+        ),
+    )
+
+
+async def single_call(
+    generator: ArticleGenerator, scraped_content: str, selected_topic: str
+) -> None:
+    await generator.generate_short_fields(
+        scraped_content=scraped_content, selected_topic=selected_topic
+    )
+
+
+async def benchmark(articles_count: int = 5) -> None:
+    """Generate the short fields of the same articles both ways and compare tokens and latency. The response
+    cache is bypassed, so every run reaches the LLM"""
+    articles = pd.read_csv(ORIGINAL_ARTICLES_CSV, delimiter=";").head(articles_count)
+    generator = ArticleGenerator(bypass_cache=True)
+    history = generator.lm_pool.get("gpt-4.1-mini").history
+    known_entries = {entry["uuid"] for entry in history}
+
+    totals = {"per-field": Counter(), "single call": Counter()}
+    latencies: dict[str, list[float]] = {"per-field": [], "single call": []}
+
+    for row in articles.itertuples():
+        for mode, run in (("per-field", per_field), ("single call", single_call)):
+            start_time = time.perf_counter()
+            await run(generator, row.Article, row.Headline)
+            latencies[mode].append(time.perf_counter() - start_time)
+            # Runs are sequential, so the new history entries all belong to this run
+            totals[mode] += count_tokens(history, known_entries)
+
+    for mode, tokens in totals.items():
+        print(
+            f"{mode:>12}: {sum(latencies[mode]) / len(latencies[mode]):.2f}s avg, "
+            f"{tokens['calls']} calls, {tokens['prompt_tokens']} prompt tokens, "
+            f"{tokens['completion_tokens']} completion tokens"
+        )
+
+    saved = (
+        totals["per-field"]["prompt_tokens"] - totals["single call"]["prompt_tokens"]
+    )
+    print(f"Prompt tokens saved per article: {saved / len(articles):.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
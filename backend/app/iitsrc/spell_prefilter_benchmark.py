@@ -0,0 +1,72 @@
+import os
+import time
+
+import pandas as pd
+
+from backend.app.api.routes.grammar_checker import apply_corrections
+from backend.app.services.grammar_service.language_tool_pool import (
+    get_language_tool_pool,
+)
+from backend.app.services.grammar_service.sentence_cache import SentenceCheckCache
+from backend.app.services.grammar_service.spell_prefilter import SpellPrefilter
+from backend.app.utils.language_enum import LanguageToolLanguage
+
+GENERATED_ARTICLES_CSV = os.path.join(
+    os.path.dirname(__file__), "generated_articles.csv"
+)
+
+
+def correct_all(
+    texts: list[str], language: LanguageToolLanguage, prefilter: SpellPrefilter | None
+) -> tuple[list[str], float]:
+    # A new cache each run, so neither run profits from the other's results
+    cache = SentenceCheckCache()
+    start_time = time.perf_counter()
+    corrected = [
+        apply_corrections(text, cache.check(text, language, prefilter))
+        for text in texts
+    ]
+    return corrected, time.perf_counter() - start_time
+
+
+def benchmark(dictionary_dir: str | None = None) -> None:
+    """Correct the perexes and bodies of the generated articles with and without the spell pre-filter. The first
+    half of the articles only teaches the pre-filter words, the second half is measured
+    """
+    articles = pd.read_csv(GENERATED_ARTICLES_CSV, delimiter=";")
+    texts = [
+        text
+        for row in articles.itertuples()
+        for text in (row.Perex, row.Article)
+        if isinstance(text, str)
+    ]
+    warmup, measured = texts[: len(texts) // 2], texts[len(texts) // 2 :]
+    language = LanguageToolLanguage.SLOVAK
+    get_language_tool_pool().start()
+
+    prefilter = SpellPrefilter(dictionary_dir)
+    correct_all(warmup, language, prefilter)
+    prefilter.stats.passed = prefilter.stats.escalated = 0
+
+    full, full_time = correct_all(measured, language, None)
+    filtered, filtered_time = correct_all(measured, language, prefilter)
+
+    corrected = sum(
+        1 for text, fixed in zip(measured, full, strict=True) if text != fixed
+    )
+    missed = sum(1 for a, b in zip(full, filtered, strict=True) if a != b)
+    print(f"Full LanguageTool pass: {full_time:.2f}s for {len(measured)} texts")
+    print(
+        f"With the pre-filter:    {filtered_time:.2f}s ({full_time / filtered_time:.1f}x)"
+    )
+    print(f"Sentences: {prefilter.stats.as_dict()}")
+    print(
+        f"Texts corrected by the full pass: {corrected}, "
+        f"corrected differently with the pre-filter: {missed} "
+        f"({missed / corrected if corrected else 0:.1%})"
+    )
+    get_language_tool_pool().close()
+
+
+if __name__ == "__main__":
+    benchmark(os.environ.get("SPELL_DICTIONARY_DIR"))
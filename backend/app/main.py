@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 from contextlib import asynccontextmanager
@@ -19,14 +20,63 @@ from backend.app.api.main import api_router
 from backend.app.core.config import Settings, settings
 from backend.app.db.database import db_manager
 from backend.app.services.ai_service.article_generator import ArticleGenerator
+from backend.app.services.ai_service.lm_governor import get_lm_governor
+from backend.app.services.ai_service.lm_pool import get_lm_pool
+from backend.app.services.ai_service.program_registry import get_program_registry
+from backend.app.services.ai_service.response_cache import get_response_cache
 from backend.app.services.ai_service.response_models import TestLiteLLMPoem
+from backend.app.services.grammar_service.grammar_executor import (
+    get_grammar_executor,
+)
+from backend.app.services.grammar_service.language_tool_pool import (
+    get_language_tool_pool,
+)
+from backend.app.services.grammar_service.language_tool_server import (
+    get_shared_language_tool_server,
+)
+from backend.app.services.grammar_service.sentence_cache import (
+    get_sentence_check_cache,
+)
+from backend.app.services.grammar_service.spell_prefilter import (
+    get_spell_prefilter,
+)
+from backend.app.services.scraping_service.browser_pool import get_browser_pool
+from backend.app.services.scraping_service.content_compactor import compaction_stats
+from backend.app.services.scraping_service.jina_scraper import get_scrape_session
+from backend.app.services.scraping_service.playwright_scraper import page_load_stats
+from backend.app.utils.job_pool import get_job_pool
+from backend.app.utils.scraping_cache_functions import (
+    get_article_cache,
+    get_scrape_cache,
+    get_storm_cache,
+)
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
     FastAPICache.init(InMemoryBackend())
     db_manager.start()
+    get_lm_pool()
+    get_program_registry()
+    get_job_pool().start()
+    await get_scrape_session().start()
+    await asyncio.to_thread(get_scrape_cache().warm)
+    await asyncio.to_thread(get_storm_cache().cache.warm)
+    if settings.SCRAPER == "playwright":
+        await get_browser_pool().start()
+    await asyncio.to_thread(get_language_tool_pool().start)
     yield
+    await get_job_pool().stop()
+    await get_scrape_session().close()
+    await get_browser_pool().close()
+    await asyncio.to_thread(get_grammar_executor().shutdown)
+    await asyncio.to_thread(get_sentence_check_cache().close)
+    await asyncio.to_thread(get_language_tool_pool().close)
+    await asyncio.to_thread(get_shared_language_tool_server().close)
+    # Stores the writes still queued for the disk tier
+    await asyncio.to_thread(get_scrape_cache().close)
+    await asyncio.to_thread(get_storm_cache().cache.close)
+    await asyncio.to_thread(get_response_cache().cache.close)
     await db_manager.stop()
 
 
@@ -67,6 +117,50 @@ async def info(info_settings: Annotated[Settings, Depends(get_settings)]) -> dic
     }
 
 
+@app.get("/llm-cache/stats")
+def llm_cache_stats() -> dict:
+    return get_response_cache().stats.as_dict()
+
+
+@app.get("/llm-usage/stats")
+def llm_usage_stats() -> dict:
+    return get_lm_pool().usage()
+
+
+@app.get("/llm-governor/stats")
+def llm_governor_stats() -> dict:
+    return get_lm_governor().stats()
+
+
+@app.get("/grammar/stats")
+def grammar_stats() -> dict:
+    prefilter = get_spell_prefilter()
+    return {
+        **get_grammar_executor().stats.as_dict(),
+        "sentence_cache": get_sentence_check_cache().cache.stats.as_dict(),
+        "spell_prefilter": prefilter.stats.as_dict() if prefilter else None,
+    }
+
+
+@app.get("/scrape-cache/stats")
+def scrape_cache_stats() -> dict:
+    return {
+        **get_scrape_cache().stats.as_dict(),
+        "revalidation": get_article_cache().stats.as_dict(),
+        "storm": get_storm_cache().stats.as_dict(),
+    }
+
+
+@app.get("/scrape-page-load/stats")
+def scrape_page_load_stats() -> dict:
+    return page_load_stats.as_dict()
+
+
+@app.get("/scrape-compaction/stats")
+def scrape_compaction_stats() -> dict:
+    return compaction_stats.as_dict()
+
+
 @app.get("/use-litellm")
 async def use_litellm_key() -> TestLiteLLMPoem:
     ai_service = ArticleGenerator()
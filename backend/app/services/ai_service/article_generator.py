@@ -3,32 +3,30 @@ import os
 import re
 import sys
 
-from backend.app.api.routes.grammar_checker import correct_text
+from backend.app.api.routes.grammar_checker import (
+    correct_text_async,
+    correct_texts_async,
+)
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
 import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from functools import partial
+from typing import Any
 
 import dspy
+from pydantic import BaseModel
 
 from backend.app.core.config import settings
-from backend.app.services.ai_service.dspy_signatures import (
-    GenerateArticleBody,
-    GenerateEngagingText,
-    GenerateGraphs,
-    GenerateHeadlines,
-    GeneratePerex,
-    GenerateTags,
-    GenerateTopics,
-    RegenerateArticleBody,
-    RegenerateEngagingText,
-    RegenerateHeadlines,
-    RegeneratePerex,
-    RegenerateTags,
-    StormGenerateArticleBody,
-    StormGenerateEngagingText,
-    StormGeneratePerex,
+from backend.app.services.ai_service.field_stream import (
+    JsonStringFieldStream,
+    chunk_text,
 )
+from backend.app.services.ai_service.lm_governor import Priority, get_lm_governor
+from backend.app.services.ai_service.lm_pool import get_lm_pool
+from backend.app.services.ai_service.program_registry import get_program_registry
+from backend.app.services.ai_service.response_cache import get_response_cache
 from backend.app.services.ai_service.response_models import (
     ArticleBodyResponse,
     ArticleResponse,
@@ -36,9 +34,11 @@ from backend.app.services.ai_service.response_models import (
     GraphResponse,
     HeadlineResponse,
     PerexResponse,
+    ShortFieldsResponse,
     TagsResponse,
     TopicsResponse,
 )
+from backend.app.services.ai_service.stage_scheduler import Stage, run_stages
 from backend.app.utils.default_article import (
     default_article,
     default_topic,
@@ -48,26 +48,33 @@ from backend.app.utils.language_enum import LANGUAGE_TO_TOOL_LANG, Language
 
 class ArticleGenerator:
 
-    def __init__(self) -> None:
-        self.api_key = settings.LITE_LLM_KEY
-        self.litellm_url = "http://147.175.151.44/"
-        self.models = {
-            "gpt-4.1-mini": "openai/gpt-4.1-mini",
-            "o3-mini": "openai/o3-mini",
-        }
-
-    def _configure_lm(self, model_name: str) -> None:
-        kwargs = {
-            "model": model_name,
-            "api_key": self.api_key,
-            "base_url": self.litellm_url,
-        }
-        if model_name.startswith("openai/o3-"):
-            kwargs["temperature"] = 1.0
-            kwargs["max_tokens"] = 5000
-
-        lm = dspy.LM(**kwargs)
-        dspy.settings.configure(lm=lm, async_max_workers=8)
+    def __init__(
+        self, bypass_cache: bool = False, priority: Priority = Priority.INTERACTIVE
+    ) -> None:
+        self.lm_pool = get_lm_pool()
+        # Every LM call waits for a slot of its model, batch work yields to editors waiting on a response
+        self.governor = get_lm_governor()
+        self.priority = priority
+        self.programs = get_program_registry()
+        self.response_cache = get_response_cache()
+        # Skip cached responses when the editor explicitly asks for a new generation
+        self.bypass_cache = bypass_cache
+        self.stage_timings: dict[str, float] = {}
+
+    async def _predict(
+        self, model_name: str, signature: str, **kwargs
+    ) -> dspy.Prediction:
+        with self.lm_pool.bind(model_name) as lm:
+            return await self.response_cache.predict(
+                signature,
+                self.programs.version(signature),
+                lm.model,
+                self.governor.limited(
+                    model_name, self.priority, self.programs.get(signature)
+                ),
+                kwargs,
+                bypass=self.bypass_cache,
+            )
 
     async def generate_topics(
         self,
@@ -75,11 +82,9 @@ class ArticleGenerator:
         topics_count: int = 5,
         language: Language = Language.SLOVAK,
     ) -> TopicsResponse:
-        self._configure_lm(self.models.get("gpt-4.1-mini"))
-
-        generate_topics_program = GenerateTopics()
-        generate_topics_program = dspy.asyncify(generate_topics_program)
-        generated_topics = await generate_topics_program(
+        generated_topics = await self._predict(
+            "gpt-4.1-mini",
+            "GenerateTopicsSignature",
             topics_count=topics_count,
             scraped_content=scraped_content,
             language=language,
@@ -97,72 +102,191 @@ class ArticleGenerator:
         headlines_count: int = 3,
         tag_count: int = 4,
         language: Language = Language.SLOVAK,
+        on_stage_done: Callable[[str, Any], Awaitable[None]] | None = None,
+        single_call_short_fields: bool | None = None,
     ) -> ArticleResponse:
-        self._configure_lm(self.models.get("gpt-4.1-mini"))
+        if single_call_short_fields is None:
+            single_call_short_fields = settings.SINGLE_CALL_SHORT_FIELDS
 
-        headlines = (
-            await self.generate_headlines(
+        stage_run = await run_stages(
+            self._article_stages(
                 scraped_content=scraped_content,
                 selected_topic=selected_topic,
+                storm_article=storm_article,
                 headlines_count=headlines_count,
+                tag_count=tag_count,
                 language=language,
+                single_call_short_fields=single_call_short_fields,
             ),
+            on_stage_done=on_stage_done,
         )
-        perex = (
-            await self.generate_perex(
-                scraped_content=scraped_content,
-                selected_topic=selected_topic,
-                storm_article=storm_article,
-                current_headline=None,
-                language=language,
-            ),
+        self.stage_timings = stage_run.timings
+
+        results = stage_run.results
+        graph_metadata = results["graph"]
+
+        return ArticleResponse(
+            headlines=results["headlines"].headlines,
+            perex=results["perex"].perex,
+            engaging_text=results["engaging_text"].engaging_text,
+            article=results["body"].article,
+            tags=results["tags"].tags,
+            gen_graph=graph_metadata.gen_graph,
+            graph_title=graph_metadata.graph_title,
+            graph_type=graph_metadata.graph_type,
+            graph_axis_labels=graph_metadata.graph_axis_labels,
+            graph_data=graph_metadata.graph_data,
         )
-        engaging_text = (
-            await self.generate_engaging_text(
-                scraped_content=scraped_content,
-                selected_topic=selected_topic,
-                storm_article=storm_article,
-                current_headline=None,
-                language=language,
+
+    def _article_stages(
+        self,
+        scraped_content: str | None,
+        selected_topic: str | None,
+        storm_article: str | None,
+        headlines_count: int,
+        tag_count: int,
+        language: Language,
+        single_call_short_fields: bool = False,
+    ) -> list[Stage]:
+        body_and_graph = [
+            Stage(
+                "body",
+                partial(
+                    self.generate_article_body,
+                    scraped_content=scraped_content,
+                    selected_topic=selected_topic,
+                    storm_article=storm_article,
+                    current_headline=None,
+                    language=language,
+                ),
             ),
-        )
-        article = (
-            await self.generate_article_body(
-                scraped_content=scraped_content,
-                selected_topic=selected_topic,
-                storm_article=storm_article,
-                current_headline=None,
-                language=language,
+            Stage(
+                "graph",
+                partial(
+                    self.generate_graph,
+                    scraped_content=scraped_content,
+                    language=language,
+                ),
             ),
-        )
-        tags = (
-            await self.generate_tags(
-                scraped_content=scraped_content,
-                selected_topic=selected_topic,
-                current_headline=None,
-                current_article=article[0].article,
-                tag_count=tag_count,
-                language=language,
+        ]
+
+        if single_call_short_fields:
+            # One call for all short fields, each field is still reported as its own stage once the call finishes
+            return [
+                Stage(
+                    "short_fields",
+                    partial(
+                        self.generate_short_fields,
+                        scraped_content=scraped_content,
+                        selected_topic=selected_topic,
+                        storm_article=storm_article,
+                        headlines_count=headlines_count,
+                        tag_count=tag_count,
+                        language=language,
+                    ),
+                    internal=True,
+                ),
+                *(
+                    Stage(
+                        field,
+                        partial(self._short_field, field),
+                        depends_on=("short_fields",),
+                    )
+                    for field in ("headlines", "perex", "engaging_text", "tags")
+                ),
+                *body_and_graph,
+            ]
+
+        # Only tags need the generated body, everything else can run at the same time
+        return [
+            Stage(
+                "headlines",
+                partial(
+                    self.generate_headlines,
+                    scraped_content=scraped_content,
+                    selected_topic=selected_topic,
+                    headlines_count=headlines_count,
+                    language=language,
+                ),
             ),
-        )
-        graph_metadata = (
-            await self.generate_graph(
-                scraped_content=scraped_content,
-                language=language,
+            Stage(
+                "perex",
+                partial(
+                    self.generate_perex,
+                    scraped_content=scraped_content,
+                    selected_topic=selected_topic,
+                    storm_article=storm_article,
+                    current_headline=None,
+                    language=language,
+                ),
             ),
+            Stage(
+                "engaging_text",
+                partial(
+                    self.generate_engaging_text,
+                    scraped_content=scraped_content,
+                    selected_topic=selected_topic,
+                    storm_article=storm_article,
+                    current_headline=None,
+                    language=language,
+                ),
+            ),
+            Stage(
+                "tags",
+                lambda body: self.generate_tags(
+                    scraped_content=scraped_content,
+                    selected_topic=selected_topic,
+                    current_headline=None,
+                    current_article=body.article,
+                    tag_count=tag_count,
+                    language=language,
+                ),
+                depends_on=("body",),
+            ),
+            *body_and_graph,
+        ]
+
+    @staticmethod
+    async def _short_field(field: str, short_fields: ShortFieldsResponse) -> BaseModel:
+        return getattr(short_fields, field)
+
+    async def generate_short_fields(
+        self,
+        scraped_content: str | None,
+        selected_topic: str | None,
+        storm_article: str | None = None,
+        headlines_count: int = 3,
+        tag_count: int = 4,
+        language: Language = Language.SLOVAK,
+    ) -> ShortFieldsResponse:
+        """Headlines, perex, engaging text and tags of a new article in a single call, so the scraped content and
+        guidelines are sent once instead of four times"""
+        signature = (
+            "StormGenerateShortFieldsSignature"
+            if storm_article
+            else "GenerateShortFieldsSignature"
         )
+        kwargs = {
+            "scraped_content": scraped_content,
+            "selected_topic": selected_topic,
+            "headlines_count": headlines_count,
+            "tag_count": tag_count,
+            "language": language,
+        }
+        if storm_article:
+            kwargs["storm_article"] = storm_article
 
-        return ArticleResponse(
-            headlines=headlines[0].headlines,
-            perex=perex[0].perex,
-            engaging_text=engaging_text[0].engaging_text,
-            article=article[0].article,
-            tags=tags[0].tags,
-            gen_graph=graph_metadata[0].gen_graph,
-            graph_title=graph_metadata[0].graph_title,
-            graph_type=graph_metadata[0].graph_type,
-            graph_axis_labels=graph_metadata[0].graph_axis_labels,
-            graph_data=graph_metadata[0].graph_data,
+        generated = await self._predict("gpt-4.1-mini", signature, **kwargs)
+
+        perex, engaging_text = await correct_texts_async(
+            [generated.perex.perex, generated.engaging_text.engaging_text],
+            LANGUAGE_TO_TOOL_LANG[language],
+        )
+        return ShortFieldsResponse(
+            headlines=HeadlineResponse(headlines=generated.headlines.headlines),
+            perex=PerexResponse(perex=perex),
+            engaging_text=EngagingTextResponse(engaging_text=engaging_text),
+            tags=TagsResponse(tags=self._clean_tags(generated.tags.tags)),
         )
 
     async def generate_headlines(
@@ -173,10 +297,11 @@ class ArticleGenerator:
         headlines_count: int = 3,
         language: Language = Language.SLOVAK,
     ) -> HeadlineResponse:
-        self._configure_lm(self.models.get("gpt-4.1-mini"))
-
-        generator = RegenerateHeadlines if old_headlines else GenerateHeadlines
-        generate_headlines_program = dspy.asyncify(generator().forward)
+        signature = (
+            "RegenerateHeadlinesSignature"
+            if old_headlines
+            else "GenerateHeadlinesSignature"
+        )
         kwargs = {
             "scraped_content": scraped_content,
             "selected_topic": selected_topic,
@@ -186,7 +311,7 @@ class ArticleGenerator:
         if old_headlines:
             kwargs["old_headlines"] = old_headlines
 
-        generated_headlines = await generate_headlines_program(**kwargs)
+        generated_headlines = await self._predict("gpt-4.1-mini", signature, **kwargs)
 
         headlines = generated_headlines.headlines.headlines
 
@@ -201,20 +326,17 @@ class ArticleGenerator:
         old_engaging_text: str | None = None,
         language: Language = Language.SLOVAK,
     ) -> EngagingTextResponse:
-        self._configure_lm(self.models.get("gpt-4.1-mini"))
-
         if storm_article and old_engaging_text:
             raise NotImplementedError(
                 "STORM regenerate engaging text is not implemented yet."
             )
         elif storm_article:
-            generator = StormGenerateEngagingText
+            signature = "StormGenerateEngagingTextSignature"
         elif old_engaging_text:
-            generator = RegenerateEngagingText
+            signature = "RegenerateEngagingTextSignature"
         else:
-            generator = GenerateEngagingText
+            signature = "GenerateEngagingTextSignature"
 
-        generate_engaging_text_program = dspy.asyncify(generator())
         kwargs = {
             "scraped_content": scraped_content,
             "selected_topic": selected_topic,
@@ -226,10 +348,12 @@ class ArticleGenerator:
         if old_engaging_text:
             kwargs["old_engaging_text"] = old_engaging_text
 
-        generated_engaging_text = await generate_engaging_text_program(**kwargs)
+        generated_engaging_text = await self._predict(
+            "gpt-4.1-mini", signature, **kwargs
+        )
 
         return EngagingTextResponse(
-            engaging_text=correct_text(
+            engaging_text=await correct_text_async(
                 generated_engaging_text.engaging_text.engaging_text,
                 LANGUAGE_TO_TOOL_LANG[language],
             )
@@ -244,18 +368,15 @@ class ArticleGenerator:
         old_perex: str | None = None,
         language: Language = Language.SLOVAK,
     ) -> PerexResponse:
-        self._configure_lm(self.models.get("gpt-4.1-mini"))
-
         if storm_article and old_perex:
             raise NotImplementedError("STORM regenerate perex is not implemented yet.")
         elif storm_article:
-            generator = StormGeneratePerex
+            signature = "StormGeneratePerexSignature"
         elif old_perex:
-            generator = RegeneratePerex
+            signature = "RegeneratePerexSignature"
         else:
-            generator = GeneratePerex
+            signature = "GeneratePerexSignature"
 
-        generate_perex_program = dspy.asyncify(generator())
         kwargs = {
             "scraped_content": scraped_content,
             "selected_topic": selected_topic,
@@ -267,10 +388,10 @@ class ArticleGenerator:
         if old_perex:
             kwargs["old_perex"] = old_perex
 
-        generated_perex = await generate_perex_program(**kwargs)
+        generated_perex = await self._predict("gpt-4.1-mini", signature, **kwargs)
 
         return PerexResponse(
-            perex=correct_text(
+            perex=await correct_text_async(
                 generated_perex.perex.perex, LANGUAGE_TO_TOOL_LANG[language]
             )
         )
@@ -284,36 +405,92 @@ class ArticleGenerator:
         old_article: str | None = None,
         language: Language = Language.SLOVAK,
     ) -> ArticleBodyResponse:
-        self._configure_lm(self.models.get("o3-mini"))
+        signature, kwargs = self._article_body_request(
+            scraped_content,
+            selected_topic,
+            current_headline,
+            storm_article,
+            old_article,
+        )
+        kwargs["language"] = language
 
+        generated_article = await self._predict("o3-mini", signature, **kwargs)
+
+        return ArticleBodyResponse(
+            article=await correct_text_async(
+                generated_article.article.article, LANGUAGE_TO_TOOL_LANG[language]
+            )
+        )
+
+    async def stream_article_body(
+        self,
+        scraped_content: str | None,
+        selected_topic: str | None,
+        current_headline: str | None,
+        storm_article: str | None = None,
+        old_article: str | None = None,
+        language: Language = Language.SLOVAK,
+    ) -> AsyncIterator[str | ArticleBodyResponse]:
+        """Yields pieces of the article body as the model writes them, followed by the complete grammar-corrected
+        ArticleBodyResponse"""
+        signature, kwargs = self._article_body_request(
+            scraped_content,
+            selected_topic,
+            current_headline,
+            storm_article,
+            old_article,
+        )
+        kwargs["language"] = language
+
+        article_field = JsonStringFieldStream("article")
+        with self.lm_pool.bind("o3-mini") as lm:
+            async for value in self.response_cache.stream(
+                signature,
+                self.programs.version(signature),
+                lm.model,
+                self.governor.limited_stream(
+                    "o3-mini", self.priority, self.programs.get_streaming(signature)
+                ),
+                kwargs,
+                bypass=self.bypass_cache,
+            ):
+                if isinstance(value, dspy.Prediction):
+                    yield ArticleBodyResponse(
+                        article=await correct_text_async(
+                            value.article.article, LANGUAGE_TO_TOOL_LANG[language]
+                        )
+                    )
+                elif text := article_field.feed(chunk_text(value)):
+                    yield text
+
+    @staticmethod
+    def _article_body_request(
+        scraped_content: str | None,
+        selected_topic: str | None,
+        current_headline: str | None,
+        storm_article: str | None,
+        old_article: str | None,
+    ) -> tuple[str, dict[str, Any]]:
         if storm_article and old_article:
             raise NotImplementedError("STORM regenerate body is not implemented yet.")
         elif storm_article:
-            generator = StormGenerateArticleBody
+            signature = "StormGenerateArticleBodySignature"
         elif old_article:
-            generator = RegenerateArticleBody
+            signature = "RegenerateArticleBodySignature"
         else:
-            generator = GenerateArticleBody
+            signature = "GenerateArticleBodySignature"
 
-        generate_article_body_program = dspy.asyncify(generator())
         kwargs = {
             "scraped_content": scraped_content,
             "selected_topic": selected_topic,
             "current_headline": current_headline,
-            "language": language,
         }
         if storm_article:
             kwargs["storm_article"] = storm_article
         if old_article:
             kwargs["old_article"] = old_article
 
-        generated_article = await generate_article_body_program(**kwargs)
-
-        return ArticleBodyResponse(
-            article=correct_text(
-                generated_article.article.article, LANGUAGE_TO_TOOL_LANG[language]
-            )
-        )
+        return signature, kwargs
 
     async def generate_tags(
         self,
@@ -325,11 +502,8 @@ class ArticleGenerator:
         tag_count: int = 4,
         language: Language = Language.SLOVAK,
     ) -> TagsResponse:
-        self._configure_lm(self.models.get("gpt-4.1-mini"))
-
-        generator = RegenerateTags if old_tags else GenerateTags
+        signature = "RegenerateTagsSignature" if old_tags else "GenerateTagsSignature"
 
-        generate_tags_program = dspy.asyncify(generator())
         kwargs = {
             "scraped_content": scraped_content,
             "selected_topic": selected_topic,
@@ -341,35 +515,36 @@ class ArticleGenerator:
         if old_tags:
             kwargs["old_tags"] = old_tags
 
-        generated_tags = await generate_tags_program(**kwargs)
+        generated_tags = await self._predict("gpt-4.1-mini", signature, **kwargs)
 
+        return TagsResponse(tags=self._clean_tags(generated_tags.tags.tags))
+
+    @staticmethod
+    def _clean_tags(tags: list[str]) -> list[str]:
         slovak_chars = "áäčďéíĺľňóôŕšťúýž"
         pattern = re.compile(rf"^[a-z{slovak_chars}# ]+$")
         cleaned_tags: list[str] = []
 
-        for t in generated_tags.tags.tags:
+        for t in tags:
             if not pattern.fullmatch(t):
                 t = t.lower().replace("_", " ")
             cleaned_tags.append(t)
 
-        return TagsResponse(tags=cleaned_tags)
+        return cleaned_tags
 
     async def generate_graph(
         self,
         scraped_content: str | None,
         language: Language = Language.SLOVAK,
     ) -> GraphResponse:
-        self._configure_lm(self.models.get("gpt-4.1-mini"))
-
-        generator = GenerateGraphs
+        signature = "GenerateGraphsSignature"
 
-        generate_graphs_program = dspy.asyncify(generator())
         kwargs = {
             "scraped_content": scraped_content,
             "language": language,
         }
 
-        graph_response = await generate_graphs_program(**kwargs)
+        graph_response = await self._predict("gpt-4.1-mini", signature, **kwargs)
 
         graph_data = graph_response.graph_data
         if isinstance(graph_data, str):
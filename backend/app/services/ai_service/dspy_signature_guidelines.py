@@ -213,6 +213,36 @@ The old tags are in the old_tags InputField. Do not repeat them, and they should
 
 # endregion
 
+# region Short fields
+SHORT_FIELDS_INTRO = """
+Generate the headlines, perex, engaging text and tags of one news article in a single response. Each section below
+describes one of the OutputFields. The headlines are generated together with the other fields, so wherever a section
+mentions current_headline use the first generated headline instead, and wherever it mentions current_article use the
+scraped_content. Every OutputField has to be filled.
+"""
+
+GENERATE_SHORT_FIELDS_DOC = f"""{SHORT_FIELDS_INTRO.strip()}
+
+## headlines
+{HEADLINE_GUIDELINES.strip()}
+
+## perex
+{PEREX_GUIDELINES.strip()}
+
+## engaging_text
+{ENGAGING_TEXT_GUIDELINES.strip()}
+
+## tags
+{TAGS_GUIDELINES.strip()}
+"""
+
+STORM_GENERATE_SHORT_FIELDS_DOC = f"""{GENERATE_SHORT_FIELDS_DOC.strip()}
+
+For the perex and the engaging text use scraped_content primarily, and augment with the storm_article InputField.
+"""
+
+# endregion
+
 # region Graphs
 GRAPHS_GUIDELINES_DOC = """
 Decide, if generating an interpretable graph from the given article is possible. If a graph cannot be generated or
@@ -8,6 +8,7 @@ from backend.app.services.ai_service.dspy_signature_guidelines import (
     GENERATE_ENGAGING_TEXT_DOC,
     GENERATE_HEADLINES_DOC,
     GENERATE_PEREX_DOC,
+    GENERATE_SHORT_FIELDS_DOC,
     GENERATE_TAGS_DOC,
     GRAPHS_GUIDELINES_DOC,
     REGENERATE_ARTICLE_DOC,
@@ -18,6 +19,7 @@ from backend.app.services.ai_service.dspy_signature_guidelines import (
     STORM_GENERATE_ARTICLE_DOC,
     STORM_GENERATE_ENGAGING_TEXT_DOC,
     STORM_GENERATE_PEREX_DOC,
+    STORM_GENERATE_SHORT_FIELDS_DOC,
     STORM_REGENERATE_ARTICLE_DOC,
     STORM_REGENERATE_ENGAGING_TEXT_DOC,
     STORM_REGENERATE_PEREX_DOC,
@@ -391,6 +393,69 @@ SIGNATURE_CONFIG = {
             "tags": {"type": list[str], "desc": "List of regenerated tags or keywords."}
         },
     },
+    "GenerateShortFieldsSignature": {
+        "doc": GENERATE_SHORT_FIELDS_DOC,
+        "inputs": {
+            "scraped_content": {"type": str, "desc": "Scraped news article."},
+            "selected_topic": {"type": str, "desc": "Selected news article topic."},
+            "headlines_count": {
+                "type": int,
+                "default": 3,
+                "desc": "Number of headlines to generate.",
+            },
+            "tag_count": {
+                "type": int,
+                "default": 4,
+                "desc": "Number of tags to generate.",
+            },
+            "language": {
+                "type": Language,
+                "default": Language.SLOVAK,
+                "desc": "Language of the news article.",
+            },
+        },
+        "outputs": {
+            "headlines": {"type": HeadlineResponse, "desc": "Generated headlines."},
+            "perex": {"type": PerexResponse, "desc": "Generated perex."},
+            "engaging_text": {
+                "type": EngagingTextResponse,
+                "desc": "Generated engaging text.",
+            },
+            "tags": {"type": TagsResponse, "desc": "Generated tags."},
+        },
+    },
+    "StormGenerateShortFieldsSignature": {
+        "doc": STORM_GENERATE_SHORT_FIELDS_DOC,
+        "inputs": {
+            "scraped_content": {"type": str, "desc": "Scraped news article."},
+            "storm_article": {"type": str, "desc": "Storm-generated article content"},
+            "selected_topic": {"type": str, "desc": "Selected news article topic."},
+            "headlines_count": {
+                "type": int,
+                "default": 3,
+                "desc": "Number of headlines to generate.",
+            },
+            "tag_count": {
+                "type": int,
+                "default": 4,
+                "desc": "Number of tags to generate.",
+            },
+            "language": {
+                "type": Language,
+                "default": Language.SLOVAK,
+                "desc": "Language of the news article.",
+            },
+        },
+        "outputs": {
+            "headlines": {"type": HeadlineResponse, "desc": "Generated headlines."},
+            "perex": {"type": PerexResponse, "desc": "Generated perex."},
+            "engaging_text": {
+                "type": EngagingTextResponse,
+                "desc": "Generated engaging text.",
+            },
+            "tags": {"type": TagsResponse, "desc": "Generated tags."},
+        },
+    },
     "GenerateGraphsSignature": {
         "doc": GRAPHS_GUIDELINES_DOC,
         "inputs": {
@@ -519,6 +584,16 @@ class RegenerateTags(BasePredictModule):
         super().__init__(SIGNATURE_CLASSES["RegenerateTagsSignature"])
 
 
+class GenerateShortFields(BasePredictModule):
+    def __init__(self) -> None:
+        super().__init__(SIGNATURE_CLASSES["GenerateShortFieldsSignature"])
+
+
+class StormGenerateShortFields(BasePredictModule):
+    def __init__(self) -> None:
+        super().__init__(SIGNATURE_CLASSES["StormGenerateShortFieldsSignature"])
+
+
 class GenerateGraphs(BaseCOTModule):
     def __init__(self) -> None:
         super().__init__(SIGNATURE_CLASSES["GenerateGraphsSignature"])
@@ -0,0 +1,71 @@
+import json
+import re
+from typing import Any
+
+
+def chunk_text(chunk: Any) -> str:  # noqa: ANN401
+    """Text delta of a streamed LiteLLM completion chunk"""
+    try:
+        return chunk.choices[0].delta.content or ""
+    except (AttributeError, IndexError):
+        return ""
+
+
+class JsonStringFieldStream:
+    """Incrementally decodes the value of one string field of a JSON object that arrives in arbitrary pieces,
+    e.g. `article` in `{"article": "..."}` produced by the model for a pydantic output field. Everything before
+    the field and after its closing quote is ignored"""
+
+    def __init__(self, field: str) -> None:
+        self._start = re.compile(rf'"{re.escape(field)}"\s*:\s*"')
+        self._buffer = ""
+        self._position: int | None = None
+        self.done = False
+
+    def feed(self, text: str) -> str:
+        """Add the next piece of the response, returns the newly decoded part of the field value"""
+        if self.done:
+            return ""
+        self._buffer += text
+
+        if self._position is None:
+            match = self._start.search(self._buffer)
+            if match is None:
+                return ""
+            self._position = match.end()
+
+        decoded = []
+        while self._position < len(self._buffer):
+            char = self._buffer[self._position]
+            if char == '"':
+                self.done = True
+                break
+            if char != "\\":
+                decoded.append(char)
+                self._position += 1
+                continue
+
+            escape = self._complete_escape(self._position)
+            if escape is None:
+                # Wait for the rest of the escape sequence
+                break
+            decoded.append(json.loads(f'"{escape}"'))
+            self._position += len(escape)
+
+        return "".join(decoded)
+
+    def _complete_escape(self, position: int) -> str | None:
+        escape = self._buffer[position : position + 2]
+        if len(escape) < 2:
+            return None
+        if escape[1] != "u":
+            return escape
+
+        escape = self._buffer[position : position + 6]
+        if len(escape) < 6:
+            return None
+        # A high surrogate is only decodable together with the low surrogate that follows it
+        if 0xD800 <= int(escape[2:], 16) <= 0xDBFF:
+            pair = self._buffer[position : position + 12]
+            return pair if len(pair) == 12 else None
+        return escape
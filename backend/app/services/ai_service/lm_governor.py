@@ -0,0 +1,239 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from enum import IntEnum
+from functools import lru_cache
+from typing import Any
+
+import litellm
+
+
+class Priority(IntEnum):
+    """Lower value is served first"""
+
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+@dataclass(frozen=True)
+class ModelBudget:
+    max_concurrency: int
+    # Calls slower than this are taken as a sign that the proxy is overloaded
+    latency_target: float
+    min_concurrency: int = 1
+
+
+# Keys match lm_pool.MODELS. o3-mini writes the article body, so its calls are few but long
+MODEL_BUDGETS = {
+    "gpt-4.1-mini": ModelBudget(max_concurrency=16, latency_target=30.0),
+    "o3-mini": ModelBudget(max_concurrency=4, latency_target=120.0),
+}
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that grows by one slot per limit-worth of fast successful calls and halves on a rate
+    limit error or a call over the latency target (AIMD). Waiting calls are let in by priority, then in order of
+    arrival"""
+
+    def __init__(
+        self, budget: ModelBudget, decrease_factor: float = 0.5, cooldown: float = 5.0
+    ) -> None:
+        self.budget = budget
+        self.decrease_factor = decrease_factor
+        # Calls running when the proxy got overloaded all fail or slow down together, that is one signal
+        self.cooldown = cooldown
+        self.limit = float(budget.max_concurrency)
+        self.in_flight = 0
+        self.rate_limited = 0
+        self.slow = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._last_decrease = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for *_, waiter in self._waiters if not waiter.done())
+
+    @asynccontextmanager
+    async def acquire(
+        self, priority: Priority = Priority.INTERACTIVE
+    ) -> AsyncIterator[None]:
+        await self._wait_for_slot(priority)
+        start_time = time.perf_counter()
+        try:
+            yield
+        except litellm.RateLimitError:
+            self.rate_limited += 1
+            self._decrease()
+            raise
+        else:
+            self._on_success(time.perf_counter() - start_time)
+        finally:
+            self.in_flight -= 1
+            self._wake()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rate_limited": self.rate_limited,
+            "slow": self.slow,
+        }
+
+    async def _wait_for_slot(self, priority: Priority) -> None:
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over right before the cancellation, pass it on
+                self.in_flight -= 1
+                self._wake()
+            raise
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            *_, waiter = heapq.heappop(self._waiters)
+            if waiter.done():
+                # Cancelled while waiting
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def _on_success(self, latency: float) -> None:
+        if latency > self.budget.latency_target:
+            self.slow += 1
+            self._decrease()
+        else:
+            self.limit = min(
+                float(self.budget.max_concurrency), self.limit + 1 / self.limit
+            )
+            self._wake()
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(
+            float(self.budget.min_concurrency), self.limit * self.decrease_factor
+        )
+
+
+class LMGovernor:
+    """One AdaptiveLimiter per model, shared by every ArticleGenerator in the process"""
+
+    def __init__(self, budgets: dict[str, ModelBudget]) -> None:
+        self._limiters = {
+            name: AdaptiveLimiter(budget) for name, budget in budgets.items()
+        }
+
+    def get(self, model_name: str) -> AdaptiveLimiter:
+        try:
+            return self._limiters[model_name]
+        except KeyError:
+            raise ValueError(
+                f"No budget for model '{model_name}', available models: {list(self._limiters)}"
+            )
+
+    def limited(
+        self,
+        model_name: str,
+        priority: Priority,
+        program: Callable[..., Awaitable[Any]],
+    ) -> Callable[..., Awaitable[Any]]:
+        """The program, holding a slot of the model for the duration of every call"""
+        limiter = self.get(model_name)
+
+        async def call(**kwargs) -> Any:  # noqa: ANN401
+            async with limiter.acquire(priority):
+                return await program(**kwargs)
+
+        return call
+
+    def limited_stream(
+        self,
+        model_name: str,
+        priority: Priority,
+        program: Callable[..., AsyncIterator[Any]],
+    ) -> Callable[..., AsyncIterator[Any]]:
+        """Streaming variant of limited(), the slot is held until the stream is exhausted"""
+        limiter = self.get(model_name)
+
+        async def stream(**kwargs) -> AsyncIterator[Any]:
+            async with limiter.acquire(priority):
+                async for value in program(**kwargs):
+                    yield value
+
+        return stream
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {name: limiter.stats() for name, limiter in self._limiters.items()}
+
+
+@lru_cache
+def get_lm_governor() -> LMGovernor:
+    return LMGovernor(MODEL_BUDGETS)
+
+
+if __name__ == "__main__":
+    # Simulated proxy that starts answering 429 above 6 concurrent calls. The limiter has to settle around that
+    # capacity, and interactive calls queued behind a batch run must not wait for the batch to drain
+
+    capacity = 6
+
+    def rate_limit_error() -> litellm.RateLimitError:
+        return litellm.RateLimitError(
+            "Too many requests", llm_provider="openai", model="gpt-4.1-mini"
+        )
+
+    async def simulate() -> None:
+        limiter = AdaptiveLimiter(
+            ModelBudget(max_concurrency=16, latency_target=1.0), cooldown=0.05
+        )
+        running = 0
+        finished: list[Priority] = []
+
+        async def call(priority: Priority) -> None:
+            nonlocal running
+            try:
+                async with limiter.acquire(priority):
+                    running += 1
+                    try:
+                        await asyncio.sleep(random.uniform(0.005, 0.015))
+                        if running > capacity:
+                            raise rate_limit_error()
+                    finally:
+                        running -= 1
+                finished.append(priority)
+            except litellm.RateLimitError:
+                await call(priority)
+
+        batch = [asyncio.create_task(call(Priority.BATCH)) for _ in range(300)]
+        await asyncio.sleep(0.05)
+        interactive = [
+            asyncio.create_task(call(Priority.INTERACTIVE)) for _ in range(20)
+        ]
+        await asyncio.gather(*batch, *interactive)
+
+        last_interactive = max(
+            i for i, priority in enumerate(finished) if priority == Priority.INTERACTIVE
+        )
+        print(f"Limit settled at {limiter.limit:.1f} (proxy capacity {capacity})")
+        print(f"429s: {limiter.rate_limited}")
+        print(
+            f"All interactive calls done after {last_interactive + 1} of {len(finished)} calls"
+        )
+
+    asyncio.run(simulate())
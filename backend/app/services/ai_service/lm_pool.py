@@ -0,0 +1,202 @@
+import asyncio
+import random
+import threading
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any
+
+import dspy
+from anyio import create_memory_object_stream, create_task_group
+
+from backend.app.core.config import settings
+from backend.app.services.ai_service.prompt_layout import get_prompt_adapter
+
+LITELLM_URL = "http://147.175.151.44/"
+MODELS = {
+    "gpt-4.1-mini": "openai/gpt-4.1-mini",
+    "o3-mini": "openai/o3-mini",
+}
+
+# Set in a response's hidden params once its usage is counted
+USAGE_COUNTED = "usage_counted"
+
+# Every asyncio task runs in its own copy of the context, so a binding made by one request is never seen by another
+_bound_lm: ContextVar[dspy.LM | None] = ContextVar("bound_lm", default=None)
+
+
+@dataclass
+class TokenUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "cached_rate": (
+                self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+            ),
+        }
+
+
+def cached_tokens(usage: dict) -> int:
+    """Prompt tokens the provider served from its prompt prefix cache"""
+    details = usage.get("prompt_tokens_details")
+    if isinstance(details, dict):
+        return details.get("cached_tokens") or 0
+    return getattr(details, "cached_tokens", None) or 0
+
+
+class PooledLM(dspy.LM):
+    """LM client shared by all requests. Only the most recent history entries are kept and nothing is added to
+    dspy's process-wide history, otherwise the history would grow for the whole lifetime of the process. Token
+    usage of the calls that reached the provider is summed up in `usage`"""
+
+    def __init__(self, model: str, history_size: int = 50, **kwargs) -> None:
+        super().__init__(model, **kwargs)
+        self.history_size = history_size
+        self.usage = TokenUsage()
+        self._usage_lock = threading.Lock()
+
+    def update_global_history(self, entry: dict) -> None:
+        # Called with the entry of each call in the thread that made it, unlike self.history[-1]. Not forwarded to
+        # dspy.clients.base_lm.GLOBAL_HISTORY, which is never trimmed
+        hidden_params = getattr(entry["response"], "_hidden_params", None)
+        if not isinstance(hidden_params, dict) or hidden_params.get("cache_hit"):
+            return
+        usage = entry["usage"]
+        with self._usage_lock:
+            # dspy's in-memory request cache returns the same response object again, it is counted once
+            if hidden_params.get(USAGE_COUNTED):
+                return
+            hidden_params[USAGE_COUNTED] = True
+            self.usage.calls += 1
+            self.usage.prompt_tokens += usage.get("prompt_tokens") or 0
+            self.usage.cached_tokens += cached_tokens(usage)
+            self.usage.completion_tokens += usage.get("completion_tokens") or 0
+
+    def __call__(
+        self,
+        prompt: str | None = None,
+        messages: list[dict] | None = None,
+        **kwargs,
+    ) -> list:
+        outputs = super().__call__(prompt=prompt, messages=messages, **kwargs)
+        del self.history[: -self.history_size]
+        return outputs
+
+
+def build_lm(model: str, api_key: str, base_url: str) -> PooledLM:
+    kwargs = {
+        "model": model,
+        "api_key": api_key,
+        "base_url": base_url,
+    }
+    if model.startswith("openai/o3-"):
+        kwargs["temperature"] = 1.0
+        kwargs["max_tokens"] = 5000
+
+    return PooledLM(**kwargs)
+
+
+class LMPool:
+    def __init__(self, models: dict[str, str], api_key: str, base_url: str) -> None:
+        self._lms = {
+            name: build_lm(model, api_key, base_url) for name, model in models.items()
+        }
+
+    def get(self, model_name: str) -> dspy.LM:
+        try:
+            return self._lms[model_name]
+        except KeyError:
+            raise ValueError(
+                f"Unknown model '{model_name}', available models: {list(self._lms)}"
+            )
+
+    def usage(self) -> dict[str, dict[str, Any]]:
+        return {name: lm.usage.as_dict() for name, lm in self._lms.items()}
+
+    @contextmanager
+    def bind(self, model_name: str) -> Iterator[dspy.LM]:
+        """Bind the model to the current context, programs started with call_program inside the block use it"""
+        lm = self.get(model_name)
+        token = _bound_lm.set(lm)
+        try:
+            yield lm
+        finally:
+            _bound_lm.reset(token)
+
+
+def current_lm() -> dspy.LM:
+    lm = _bound_lm.get()
+    if lm is None:
+        raise RuntimeError("No LM is bound. Call the program inside LMPool.bind().")
+    return lm
+
+
+async def call_program(program: dspy.Module, **kwargs) -> Any:  # noqa: ANN401
+    """Run the program in a worker thread with the LM bound to the current context"""
+    lm = current_lm()
+
+    def run_with_lm(**program_kwargs) -> Any:  # noqa: ANN401
+        # dspy.context is thread-local, it only affects the worker thread running this call
+        with dspy.context(lm=lm, adapter=get_prompt_adapter()):
+            return program(**program_kwargs)
+
+    return await dspy.asyncify(run_with_lm)(**kwargs)
+
+
+async def stream_program(program: dspy.Module, **kwargs) -> AsyncIterator[Any]:
+    """Like call_program, but yields the LM response chunks as they arrive and finally the dspy.Prediction"""
+    lm = current_lm()
+    send_stream, receive_stream = create_memory_object_stream(16)
+
+    def run_with_stream(**program_kwargs) -> Any:  # noqa: ANN401
+        # dspy forwards the completion chunks to send_stream when it is set in the settings
+        with dspy.context(lm=lm, adapter=get_prompt_adapter(), send_stream=send_stream):
+            return program(**program_kwargs)
+
+    async def produce() -> None:
+        async with send_stream:
+            prediction = await dspy.asyncify(run_with_stream)(**kwargs)
+            await send_stream.send(prediction)
+
+    async with create_task_group() as task_group, receive_stream:
+        task_group.start_soon(produce)
+        async for value in receive_stream:
+            yield value
+
+
+@lru_cache
+def get_lm_pool() -> LMPool:
+    return LMPool(MODELS, settings.LITE_LLM_KEY, LITELLM_URL)
+
+
+if __name__ == "__main__":
+    # Concurrency stress check: a lot of overlapping requests bind different models and each program call has to
+    # see exactly the model its own request bound, no matter how the calls interleave
+
+    class CurrentModel(dspy.Module):
+        def forward(self) -> str:
+            return dspy.settings.lm.model
+
+    async def fake_request(pool: LMPool, model_name: str) -> None:
+        for _ in range(5):
+            with pool.bind(model_name) as lm:
+                await asyncio.sleep(random.random() / 100)
+                used_model = await call_program(CurrentModel())
+                assert (
+                    used_model == lm.model
+                ), f"Request bound {lm.model}, but the program ran on {used_model}"
+
+    async def stress(requests: int = 500) -> None:
+        pool = LMPool(MODELS, api_key="test", base_url=LITELLM_URL)
+        model_names = [random.choice(list(MODELS)) for _ in range(requests)]
+        await asyncio.gather(*(fake_request(pool, name) for name in model_names))
+        print(f"{requests} concurrent requests, no cross-request model leakage")
+
+    asyncio.run(stress())
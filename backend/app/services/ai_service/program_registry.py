@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import timeit
+from collections.abc import AsyncIterator, Awaitable, Callable
+from functools import lru_cache, partial
+from typing import Any
+
+import dspy
+
+from backend.app.core.config import settings
+from backend.app.services.ai_service.dspy_signatures import (
+    SIGNATURE_CLASSES,
+    BaseCOTModule,
+    BasePredictModule,
+    GenerateGraphs,
+    GenerateHeadlines,
+)
+from backend.app.services.ai_service.lm_pool import call_program, stream_program
+from backend.app.services.ai_service.prompt_layout import get_prompt_adapter
+
+OPTIMIZED_SIGNATURES_DIR = os.path.join(
+    os.path.dirname(__file__), "optimized_signatures"
+)
+
+# Saved states of the optimized programs, the field order in them matches the signatures in SIGNATURE_CONFIG
+OPTIMIZED_STATE_FILES = {
+    "GenerateHeadlinesSignature": "Generate_Headlines.json",
+    "GeneratePerexSignature": "Generate_Perex.json",
+    "GenerateArticleBodySignature": "Generate_Body.json",
+    "GenerateTagsSignature": "Generate_Tags.json",
+}
+
+COT_SIGNATURES = {"GenerateGraphsSignature"}
+
+
+def load_optimized_state(program: dspy.Module, file_name: str) -> None:
+    with open(os.path.join(OPTIMIZED_SIGNATURES_DIR, file_name)) as f:
+        state = json.load(f)
+
+    # Each file holds the state of a single predictor, saved under the attribute name used during optimization
+    (predictor_state,) = state.values()
+    program._predictor.load_state(predictor_state)
+
+
+def program_version(program: dspy.Module) -> str:
+    """Digest of everything that shapes the program's prompts: the instructions, fields and demos of its
+    predictors and the adapter formatting them. It changes when a deploy changes a prompt or loads new demos
+    """
+    predictors = {
+        name: {
+            **predictor.dump_state(),
+            "annotations": {
+                field: str(info.annotation)
+                for field, info in predictor.signature.fields.items()
+            },
+        }
+        for name, predictor in program.named_predictors()
+    }
+    adapter = type(get_prompt_adapter() or dspy.ChatAdapter()).__name__
+    payload = json.dumps(
+        {"predictors": predictors, "adapter": adapter},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class ProgramRegistry:
+    """Builds every program from SIGNATURE_CLASSES once, so requests reuse them instead of constructing new
+    dspy.Predict / dspy.ChainOfThought objects on every call"""
+
+    def __init__(self, load_optimized: bool = False) -> None:
+        self._programs: dict[str, dspy.Module] = {}
+        self._versions: dict[str, str] = {}
+
+        for name, signature_cls in SIGNATURE_CLASSES.items():
+            module_cls = BaseCOTModule if name in COT_SIGNATURES else BasePredictModule
+            program = module_cls(signature_cls)
+            if load_optimized and name in OPTIMIZED_STATE_FILES:
+                load_optimized_state(program, OPTIMIZED_STATE_FILES[name])
+            self._programs[name] = program
+            self._versions[name] = program_version(program)
+
+    def get(self, signature_name: str) -> Callable[..., Awaitable[Any]]:
+        """Async program for the signature, running on the LM bound with LMPool.bind()"""
+        return partial(call_program, self._get_program(signature_name))
+
+    def get_streaming(self, signature_name: str) -> Callable[..., AsyncIterator[Any]]:
+        """Streaming variant of get(), see stream_program"""
+        return partial(stream_program, self._get_program(signature_name))
+
+    def version(self, signature_name: str) -> str:
+        """See program_version, cached responses of another version are not reused"""
+        self._get_program(signature_name)
+        return self._versions[signature_name]
+
+    def _get_program(self, signature_name: str) -> dspy.Module:
+        try:
+            return self._programs[signature_name]
+        except KeyError:
+            raise ValueError(f"No program registered for '{signature_name}'")
+
+
+@lru_cache
+def get_program_registry() -> ProgramRegistry:
+    return ProgramRegistry(load_optimized=settings.USE_OPTIMIZED_SIGNATURES)
+
+
+if __name__ == "__main__":
+    # Microbenchmark of the per-request overhead removed by the registry: building the programs for one article
+    # (what every request used to do) compared to looking them up in the registry
+    number = 1000
+    registry = ProgramRegistry()
+    article_signatures = [
+        "GenerateHeadlinesSignature",
+        "GeneratePerexSignature",
+        "GenerateEngagingTextSignature",
+        "GenerateArticleBodySignature",
+        "GenerateTagsSignature",
+    ]
+
+    def construct_per_request() -> None:
+        for name in article_signatures:
+            dspy.asyncify(BasePredictModule(SIGNATURE_CLASSES[name]))
+        dspy.asyncify(GenerateGraphs())
+
+    def lookup_in_registry() -> None:
+        for name in [*article_signatures, "GenerateGraphsSignature"]:
+            registry.get(name)
+
+    construct = timeit.timeit(construct_per_request, number=number) / number
+    lookup = timeit.timeit(lookup_in_registry, number=number) / number
+    single = timeit.timeit(GenerateHeadlines, number=number) / number
+
+    print(f"Single GenerateHeadlines() construction: {single * 1e6:.1f} us")
+    print(f"Programs for one article, constructed:   {construct * 1e6:.1f} us")
+    print(f"Programs for one article, from registry: {lookup * 1e6:.1f} us")
+    print(f"Saved per article: {(construct - lookup) * 1e6:.1f} us")
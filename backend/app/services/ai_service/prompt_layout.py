@@ -0,0 +1,132 @@
+from functools import lru_cache
+from typing import Any
+
+import dspy
+from dspy.adapters.chat_adapter import (
+    FieldInfoWithName,
+    format_fields,
+    format_turn,
+    prepare_instructions,
+)
+
+from backend.app.core.config import settings
+
+# Inputs every generation call for one article gets with the same value, in the order they are placed in the
+# shared prefix. A signature without one of them just skips it
+SHARED_PREFIX_FIELDS = (
+    "scraped_content",
+    "storm_article",
+    "selected_topic",
+    "language",
+)
+
+SHARED_PREFIX_SYSTEM_MESSAGE = (
+    "You are an assistant of a news agency, writing parts of a news article from the source material the user "
+    "sends first. The task itself and its remaining input fields follow after the source material."
+)
+
+
+class PrefixCacheAdapter(dspy.ChatAdapter):
+    """ChatAdapter that puts the inputs shared by all calls for one article first and the signature's
+    instructions last, so the provider's prompt prefix cache can reuse the source content across the calls.
+
+    Messages: a fixed system message, the shared inputs, the instructions (followed by the demos, if any) and the
+    remaining inputs of the signature"""
+
+    def format(
+        self,
+        signature: type[dspy.Signature],
+        demos: list[dict[str, Any]],
+        inputs: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        shared = [
+            name
+            for name in SHARED_PREFIX_FIELDS
+            if name in signature.input_fields and name in inputs
+        ]
+        has_history = any(
+            field.annotation == dspy.History
+            for field in signature.input_fields.values()
+        )
+        if not shared or has_history:
+            return super().format(signature, demos, inputs)
+
+        fields = signature.input_fields
+        shared_context = format_fields(
+            {FieldInfoWithName(name, fields[name]): inputs[name] for name in shared}
+        )
+        instructions = prepare_instructions(signature)
+        remaining_signature = remove_fields(signature, tuple(shared))
+        remaining_inputs = {
+            name: value for name, value in inputs.items() if name not in shared
+        }
+        task = format_turn(remaining_signature, remaining_inputs, role="user")
+
+        messages = [
+            {"role": "system", "content": SHARED_PREFIX_SYSTEM_MESSAGE},
+            {"role": "user", "content": shared_context},
+        ]
+        if demos:
+            messages.append({"role": "user", "content": instructions})
+            # ChatAdapter formats the demos with the full signature, dropping or marking the incomplete ones. Only
+            # its system message and final turn are left out, the single input turn of a signature without history
+            messages.extend(super().format(signature, demos, inputs)[1:-1])
+            messages.append(task)
+        else:
+            messages.append(
+                {"role": "user", "content": f"{instructions}\n\n{task['content']}"}
+            )
+        return messages
+
+
+@lru_cache(maxsize=256)
+def remove_fields(
+    signature: type[dspy.Signature], names: tuple[str, ...]
+) -> type[dspy.Signature]:
+    for name in names:
+        signature = signature.delete(name)
+    return signature
+
+
+@lru_cache
+def get_prompt_adapter() -> dspy.Adapter | None:
+    """Adapter the generation programs run with, None keeps dspy's default ChatAdapter"""
+    return PrefixCacheAdapter() if settings.PREFIX_CACHE_PROMPT_LAYOUT else None
+
+
+if __name__ == "__main__":
+    # The prompts of all fields of one article have to start with the same messages
+    from backend.app.services.ai_service.dspy_signatures import SIGNATURE_CLASSES
+    from backend.app.utils.default_article import default_article, default_topic
+    from backend.app.utils.language_enum import Language
+
+    inputs = {
+        "scraped_content": default_article,
+        "selected_topic": default_topic,
+        "current_headline": "Ceny palív stagnujú na Slovensku",
+        "current_article": default_article,
+        "headlines_count": 3,
+        "tag_count": 4,
+        "language": Language.SLOVAK,
+    }
+    adapter = PrefixCacheAdapter()
+    prompts = {}
+    for name in [
+        "GenerateHeadlinesSignature",
+        "GeneratePerexSignature",
+        "GenerateEngagingTextSignature",
+        "GenerateArticleBodySignature",
+        "GenerateTagsSignature",
+    ]:
+        signature = SIGNATURE_CLASSES[name]
+        signature_inputs = {
+            k: v for k, v in inputs.items() if k in signature.input_fields
+        }
+        prompts[name] = adapter.format(signature, [], signature_inputs)
+
+    prefixes = {str(messages[:2]) for messages in prompts.values()}
+    assert len(prefixes) == 1, "The shared prefix differs between the signatures"
+    prefix_length = len(prefixes.pop())
+    for name, messages in prompts.items():
+        total = len(str(messages))
+        print(f"{name}: {prefix_length / total:.0%} of {total} characters shared")
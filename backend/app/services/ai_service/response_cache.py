@@ -0,0 +1,142 @@
+import hashlib
+import json
+import re
+from collections.abc import AsyncIterator, Awaitable, Callable
+from enum import Enum
+from functools import lru_cache
+from typing import Any
+
+import dspy
+from pydantic import BaseModel, TypeAdapter
+
+from backend.app.core.config import settings
+from backend.app.services.ai_service.dspy_signatures import SIGNATURE_CLASSES
+from backend.app.utils.tiered_cache import CacheStats, TieredCache
+
+
+def normalize_input(value: Any) -> Any:  # noqa: ANN401
+    """Whitespace differences in the scraped content or old_* fields should not produce a different key"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip()
+    if isinstance(value, list | tuple):
+        return [normalize_input(item) for item in value]
+    if isinstance(value, dict):
+        return {key: normalize_input(item) for key, item in value.items()}
+    return value
+
+
+def response_cache_key(
+    signature: str, version: str, model: str, inputs: dict[str, Any]
+) -> str:
+    payload = json.dumps(
+        {
+            "signature": signature,
+            "version": version,
+            "model": model,
+            "inputs": normalize_input(inputs),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return f"{signature}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+def dump_output(value: Any) -> Any:  # noqa: ANN401
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return value
+
+
+class ResponseCache:
+    """Caches program outputs by signature, program version, model and normalized inputs, so a repeated prompt
+    is not paid for again. The version (ProgramRegistry.version) keeps outputs of a changed prompt from being
+    served after a deploy"""
+
+    def __init__(self, cache: TieredCache) -> None:
+        self.cache = cache
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.cache.stats
+
+    async def predict(
+        self,
+        signature: str,
+        version: str,
+        model: str,
+        program: Callable[..., Awaitable[dspy.Prediction]],
+        inputs: dict[str, Any],
+        bypass: bool = False,
+    ) -> dspy.Prediction:
+        key = response_cache_key(signature, version, model, inputs)
+
+        if not bypass:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                return self._restore(signature, cached)
+            prediction = await program(**inputs)
+        else:
+            # Asking for something new has to skip the LM's own completion cache as well
+            prediction = await program(config={"cache": False}, **inputs)
+
+        self.cache.set(
+            key, {name: dump_output(value) for name, value in prediction.items()}
+        )
+        return prediction
+
+    async def stream(
+        self,
+        signature: str,
+        version: str,
+        model: str,
+        program: Callable[..., AsyncIterator[Any]],
+        inputs: dict[str, Any],
+        bypass: bool = False,
+    ) -> AsyncIterator[Any]:
+        """Streaming variant of predict(), a cached response is yielded at once as the final prediction"""
+        key = response_cache_key(signature, version, model, inputs)
+
+        if not bypass:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                yield self._restore(signature, cached)
+                return
+            stream = program(**inputs)
+        else:
+            stream = program(config={"cache": False}, **inputs)
+
+        async for value in stream:
+            if isinstance(value, dspy.Prediction):
+                self.cache.set(
+                    key, {name: dump_output(item) for name, item in value.items()}
+                )
+            yield value
+
+    @staticmethod
+    def _restore(signature: str, outputs: dict[str, Any]) -> dspy.Prediction:
+        output_fields = SIGNATURE_CLASSES[signature].output_fields
+        return dspy.Prediction(
+            **{
+                name: (
+                    TypeAdapter(output_fields[name].annotation).validate_python(value)
+                    if name in output_fields
+                    else value
+                )
+                for name, value in outputs.items()
+            }
+        )
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache:
+    return ResponseCache(
+        TieredCache(
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl=settings.LLM_CACHE_TTL,
+            path=settings.LLM_CACHE_PATH,
+            table="llm_responses",
+        )
+    )
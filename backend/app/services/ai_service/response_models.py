@@ -192,7 +192,22 @@ class GraphResponse(BaseResponse):
     )
 
 
+class ShortFieldsResponse(BaseResponse):
+    headlines: HeadlineResponse
+    perex: PerexResponse
+    engaging_text: EngagingTextResponse
+    tags: TagsResponse
+
+
 class ExtractArticleResponse(BaseModel):
     id: int
     article: ArticleResponse
     storm_urls: Optional[list[str]]
+
+
+class JobResponse(BaseModel):
+    id: str
+    status: Literal["queued", "running", "done", "failed"]
+    partial: dict[str, Any] = {}
+    result: Optional[ExtractArticleResponse] = None
+    error: Optional[str] = None
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A single unit of generation work. Results of the stages listed in `depends_on` are passed to `run` as
+    keyword arguments named after those stages. Results of `internal` stages are not reported to on_stage_done
+    """
+
+    name: str
+    run: Callable[..., Awaitable[Any]]
+    depends_on: tuple[str, ...] = ()
+    internal: bool = False
+
+
+@dataclass
+class StageRun:
+    results: dict[str, Any] = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+class StageFailedError(Exception):
+    def __init__(self, stage: str, error: BaseException, stage_run: StageRun) -> None:
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+        self.stage_run = stage_run
+
+
+async def run_stages(
+    stages: list[Stage],
+    on_stage_done: Callable[[str, Any], Awaitable[None]] | None = None,
+) -> StageRun:
+    """Run the stages concurrently, each one starting as soon as all of its dependencies have finished.
+    `on_stage_done` is awaited with the name and result of every stage the moment it finishes.
+
+    If any stage fails, stages that have not finished yet are cancelled and StageFailedError is raised with the
+    results and timings of the stages that did finish"""
+
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        missing = set(stage.depends_on) - names
+        if missing:
+            raise ValueError(
+                f"Stage '{stage.name}' depends on unknown stages {missing}"
+            )
+
+    stage_run = StageRun()
+    started: set[str] = set()
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def run_stage(stage: Stage) -> Any:  # noqa: ANN401
+        inputs = {
+            dependency: await tasks[dependency] for dependency in stage.depends_on
+        }
+
+        started.add(stage.name)
+        start_time = time.perf_counter()
+        try:
+            result = await stage.run(**inputs)
+        finally:
+            stage_run.timings[stage.name] = time.perf_counter() - start_time
+
+        stage_run.results[stage.name] = result
+        if on_stage_done is not None and not stage.internal:
+            await on_stage_done(stage.name, result)
+        return result
+
+    for stage in stages:
+        tasks[stage.name] = asyncio.create_task(
+            run_stage(stage), name=f"stage:{stage.name}"
+        )
+
+    start_time = time.perf_counter()
+    try:
+        await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        pending = [task for task in tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    logger.info(
+        "Stages finished in %.2fs (%s)",
+        time.perf_counter() - start_time,
+        ", ".join(f"{name}: {t:.2f}s" for name, t in stage_run.timings.items()),
+    )
+
+    # Only report stages that actually ran, dependents re-raise the error of the stage they waited on
+    for name, task in tasks.items():
+        if name in started and not task.cancelled() and task.exception() is not None:
+            raise StageFailedError(
+                name, task.exception(), stage_run
+            ) from task.exception()
+
+    return stage_run
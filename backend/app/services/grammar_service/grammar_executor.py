@@ -0,0 +1,143 @@
+import asyncio
+import functools
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, TypeVar
+
+from backend.app.core.config import settings
+
+T = TypeVar("T")
+
+
+@dataclass
+class ExecutorStats:
+    # Callers waiting for capacity, then waiting for a thread
+    waiting: int = 0
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    failed: int = 0
+    total_wait: float = 0.0
+    total_run: float = 0.0
+    max_wait: float = 0.0
+    max_run: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            **asdict(self),
+            "avg_wait": self.total_wait / finished if finished else 0.0,
+            "avg_run": self.total_run / finished if finished else 0.0,
+        }
+
+
+class GrammarExecutor:
+    """Dedicated threads for the blocking LanguageTool calls, so they never run on the event loop. At most
+    `workers` calls run at once and at most `max_queued` more wait for a thread, further callers wait on the
+    event loop before they are queued. The reported wait covers both"""
+
+    def __init__(self, workers: int = 4, max_queued: int = 64) -> None:
+        self.workers = workers
+        self.max_queued = max_queued
+        self.stats = ExecutorStats()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="grammar")
+        # Admission waits on the loop, a thread blocked on a semaphore would be taken from the loop's default
+        # executor for as long as it waits
+        self._capacity = asyncio.Semaphore(workers + max_queued)
+        self._stats_lock = threading.Lock()
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:  # noqa: ANN401
+        submitted_at = time.perf_counter()
+        with self._stats_lock:
+            self.stats.waiting += 1
+        try:
+            await self._capacity.acquire()
+        finally:
+            with self._stats_lock:
+                self.stats.waiting -= 1
+
+        with self._stats_lock:
+            self.stats.queued += 1
+
+        def timed() -> T:
+            started_at = time.perf_counter()
+            with self._stats_lock:
+                self.stats.queued -= 1
+                self.stats.running += 1
+            failed = True
+            try:
+                result = fn(*args)
+                failed = False
+                return result
+            finally:
+                self._record(started_at - submitted_at, started_at, failed)
+
+        future = self._executor.submit(timed)
+        # The capacity is held until the call is really done, even when the caller stops waiting for it
+        future.add_done_callback(
+            functools.partial(self._on_done, asyncio.get_running_loop())
+        )
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, loop: asyncio.AbstractEventLoop, future: Future) -> None:
+        if future.cancelled():
+            # Never started, so timed() did not take it off the queue
+            with self._stats_lock:
+                self.stats.queued -= 1
+        # Called on the worker thread, the semaphore belongs to the loop
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(self._capacity.release)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _record(self, wait: float, started_at: float, failed: bool) -> None:
+        run = time.perf_counter() - started_at
+        with self._stats_lock:
+            self.stats.running -= 1
+            if failed:
+                self.stats.failed += 1
+            else:
+                self.stats.completed += 1
+            self.stats.total_wait += wait
+            self.stats.total_run += run
+            self.stats.max_wait = max(self.stats.max_wait, wait)
+            self.stats.max_run = max(self.stats.max_run, run)
+
+
+@lru_cache
+def get_grammar_executor() -> GrammarExecutor:
+    return GrammarExecutor(
+        workers=settings.GRAMMAR_WORKERS, max_queued=settings.GRAMMAR_QUEUE_SIZE
+    )
+
+
+if __name__ == "__main__":
+    # Event loop responsiveness while blocking "grammar checks" run: the loop keeps ticking every ~10 ms
+    # instead of freezing for the whole duration of each check
+
+    async def demo() -> None:
+        executor = GrammarExecutor(workers=2, max_queued=4)
+        ticks: list[float] = []
+
+        async def ticker() -> None:
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        await asyncio.gather(*(executor.run(time.sleep, 0.1) for _ in range(12)))
+        ticking.cancel()
+
+        max_gap = max(b - a for a, b in zip(ticks, ticks[1:], strict=False))
+        print(
+            f"12 checks of 100 ms on 2 workers, longest event loop gap {max_gap * 1000:.0f} ms"
+        )
+        print(executor.stats.as_dict())
+        executor.shutdown()
+
+    asyncio.run(demo())
@@ -0,0 +1,203 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import lru_cache
+
+import language_tool_python
+
+from backend.app.core.config import settings
+from backend.app.services.grammar_service.language_tool_server import (
+    language_tool_factory,
+)
+from backend.app.utils.language_enum import LanguageToolLanguage
+
+logger = logging.getLogger(__name__)
+
+
+class LanguageToolPool:
+    """Long-lived LanguageTool instances, `size` per language. Starting one launches a LanguageTool server, which
+    takes seconds, so they are created once and reused by every check.
+
+    An instance that has not been used for `health_check_interval` seconds is checked before it is handed out,
+    and one that fails a check or breaks during use is closed and started again"""
+
+    def __init__(
+        self,
+        languages: list[LanguageToolLanguage],
+        size: int = 1,
+        health_check_interval: float = 60,
+        factory: Callable[
+            [LanguageToolLanguage], language_tool_python.LanguageTool
+        ] = lambda language: language_tool_python.LanguageTool(language.value),
+    ) -> None:
+        self.languages = languages
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.factory = factory
+        # None stands for an instance that has to be (re)started before use
+        self._idle: dict[
+            LanguageToolLanguage, queue.Queue[language_tool_python.LanguageTool | None]
+        ] = {}
+        self._last_used: dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self) -> None:
+        """Start all instances, so the first requests do not wait for LanguageTool to boot. An instance that fails
+        to start is logged and left to be started by the first acquire, the app still starts without it
+        """
+        for language in self.languages:
+            idle = self._get_idle(language)
+            for tool in [idle.get() for _ in range(self.size)]:
+                try:
+                    if tool is None:
+                        tool = self._start_tool(language)
+                except Exception:
+                    logger.exception(
+                        "Failed to start LanguageTool for %s", language.value
+                    )
+                finally:
+                    # Every slot taken out goes back, started or not, or acquire() would wait for it forever
+                    idle.put(tool)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle_queues = list(self._idle.values())
+
+        for idle in idle_queues:
+            while True:
+                try:
+                    tool = idle.get_nowait()
+                except queue.Empty:
+                    break
+                if tool is not None:
+                    self._close_tool(tool)
+
+    @contextmanager
+    def acquire(
+        self, language: LanguageToolLanguage
+    ) -> Iterator[language_tool_python.LanguageTool]:
+        """Borrow an instance for the language, waits until one is free"""
+        if self._closed:
+            raise RuntimeError("The LanguageTool pool is closed")
+
+        idle = self._get_idle(language)
+        tool = idle.get()
+        try:
+            idle_for = time.monotonic() - self._last_used.get(id(tool), 0)
+            if (
+                tool is not None
+                and idle_for > self.health_check_interval
+                and not self._is_healthy(tool)
+            ):
+                self._discard_tool(language, tool)
+                tool = None
+            if tool is None:
+                tool = self._start_tool(language)
+
+            yield tool
+
+        except Exception:
+            if tool is not None and not self._is_healthy(tool):
+                # Started again by the next acquire
+                self._discard_tool(language, tool)
+                tool = None
+            raise
+
+        finally:
+            if tool is not None:
+                self._last_used[id(tool)] = time.monotonic()
+            if self._closed and tool is not None:
+                self._close_tool(tool)
+            else:
+                idle.put(tool)
+
+    def _get_idle(
+        self, language: LanguageToolLanguage
+    ) -> queue.Queue[language_tool_python.LanguageTool | None]:
+        with self._lock:
+            if language not in self._idle:
+                self._idle[language] = queue.Queue()
+                for _ in range(self.size):
+                    self._idle[language].put(None)
+            return self._idle[language]
+
+    def _start_tool(
+        self, language: LanguageToolLanguage
+    ) -> language_tool_python.LanguageTool:
+        start_time = time.perf_counter()
+        tool = self.factory(language)
+        self._last_used[id(tool)] = time.monotonic()
+        logger.info(
+            "Started LanguageTool for %s in %.2fs",
+            language.value,
+            time.perf_counter() - start_time,
+        )
+        return tool
+
+    def _discard_tool(
+        self, language: LanguageToolLanguage, tool: language_tool_python.LanguageTool
+    ) -> None:
+        logger.warning("LanguageTool for %s is not healthy, restarting", language.value)
+        self._close_tool(tool)
+
+    def _is_healthy(self, tool: language_tool_python.LanguageTool) -> bool:
+        try:
+            tool.check("Test.")
+            return True
+        except Exception:
+            return False
+
+    def _close_tool(self, tool: language_tool_python.LanguageTool) -> None:
+        self._last_used.pop(id(tool), None)
+        try:
+            tool.close()
+        except Exception:
+            logger.exception("Failed to close LanguageTool")
+
+
+@lru_cache
+def get_language_tool_pool() -> LanguageToolPool:
+    return LanguageToolPool(
+        list(LanguageToolLanguage),
+        # Enough instances for every shard of a sharded check
+        size=max(settings.LANGUAGE_TOOL_POOL_SIZE, settings.GRAMMAR_SHARD_WORKERS),
+        factory=language_tool_factory,
+    )
+
+
+if __name__ == "__main__":
+    # Per-call latency of correct_text before (a new LanguageTool for every call) and after (pooled instances)
+    from backend.app.utils.default_article import default_article
+
+    calls = 5
+    language = LanguageToolLanguage.SLOVAK
+
+    def per_call() -> None:
+        tool = language_tool_python.LanguageTool(language.value)
+        try:
+            tool.check(default_article)
+        finally:
+            tool.close()
+
+    pool = LanguageToolPool([language])
+    start_time = time.perf_counter()
+    pool.start()
+    startup = time.perf_counter() - start_time
+
+    def pooled() -> None:
+        with pool.acquire(language) as tool:
+            tool.check(default_article)
+
+    for name, check in (("new instance per call", per_call), ("pooled", pooled)):
+        start_time = time.perf_counter()
+        for _ in range(calls):
+            check()
+        print(f"{name}: {(time.perf_counter() - start_time) / calls:.3f}s per call")
+
+    print(f"Pool startup (paid once): {startup:.3f}s")
+    pool.close()
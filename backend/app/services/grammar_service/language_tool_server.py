@@ -0,0 +1,181 @@
+import fcntl
+import logging
+import os
+import tempfile
+import threading
+from functools import lru_cache
+from typing import Any
+
+import language_tool_python
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend.app.core.config import settings
+from backend.app.utils.language_enum import LanguageToolLanguage
+
+logger = logging.getLogger(__name__)
+
+
+class SessionLanguageTool(language_tool_python.LanguageTool):
+    """language_tool_python's remote mode with its requests sent through a shared session, so the HTTP
+    connections to the server are kept alive and reused instead of opened for every check
+    """
+
+    def __init__(
+        self, language: str, remote_server: str, session: requests.Session
+    ) -> None:
+        # The constructor already queries the server for its languages
+        self._session = session
+        super().__init__(language, remote_server=remote_server)
+
+    def _query_server(
+        self,
+        url: str,
+        params: dict[str, str] | None = None,
+        num_tries: int = 2,
+        method: str = "get",
+    ) -> Any:  # noqa: ANN401
+        for attempt in range(num_tries):
+            try:
+                if method == "post":
+                    response = self._session.post(url, data=params, timeout=30)
+                else:
+                    response = self._session.get(url, params=params, timeout=30)
+                response.raise_for_status()
+                return response.json()
+            except requests.RequestException:
+                if attempt + 1 >= num_tries:
+                    raise
+
+
+class SharedLanguageToolServer:
+    """One LanguageTool server per machine, shared by every app process through SessionLanguageTool clients.
+
+    The first process that finds no live server starts one in-process and writes its URL to `state_dir`, the
+    others attach to it. A file lock makes sure only one of them starts it. When the owning process stops, the
+    clients of the others fail their health check and the next attach starts a new server
+    """
+
+    def __init__(self, state_dir: str | None = None, pool_maxsize: int = 16) -> None:
+        self.state_dir = state_dir or os.path.join(
+            tempfile.gettempdir(), "app-languagetool"
+        )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._owned: language_tool_python.LanguageTool | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def _url_path(self) -> str:
+        return os.path.join(self.state_dir, "server_url")
+
+    def url(self) -> str:
+        """URL of the live shared server, started first if there is none"""
+        url = self._read_url()
+        if url and self._is_alive(url):
+            return url
+
+        os.makedirs(self.state_dir, exist_ok=True)
+        with self._lock, open(os.path.join(self.state_dir, "lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # Another process may have started it while this one waited for the lock
+                url = self._read_url()
+                if url and self._is_alive(url):
+                    return url
+                return self._start()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def client(self, language: LanguageToolLanguage) -> SessionLanguageTool:
+        return SessionLanguageTool(language.value, self.url(), self.session)
+
+    def close(self) -> None:
+        """Stop the server if this process started it"""
+        with self._lock:
+            if self._owned is None:
+                return
+            if self._read_url() == self._owned_url():
+                os.remove(self._url_path)
+            self._owned.close()
+            self._owned = None
+
+    def _start(self) -> str:
+        if self._owned is not None:
+            self._owned.close()
+        # A LanguageTool server checks every language, the one given here is only its default
+        self._owned = language_tool_python.LanguageTool(
+            LanguageToolLanguage.ENGLISH.value
+        )
+        url = self._owned_url()
+        with open(self._url_path, "w") as file:
+            file.write(url)
+        logger.info("Started the shared LanguageTool server at %s", url)
+        return url
+
+    def _owned_url(self) -> str:
+        # The API URL, ".../v2/", remote mode adds the "v2/" itself
+        return self._owned._url.removesuffix("v2/")
+
+    def _read_url(self) -> str | None:
+        try:
+            with open(self._url_path) as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _is_alive(self, url: str) -> bool:
+        try:
+            self.session.get(f"{url}v2/languages", timeout=5).raise_for_status()
+            return True
+        except requests.RequestException:
+            return False
+
+
+@lru_cache
+def get_shared_language_tool_server() -> SharedLanguageToolServer:
+    return SharedLanguageToolServer(settings.LANGUAGE_TOOL_STATE_DIR)
+
+
+def language_tool_factory(
+    language: LanguageToolLanguage,
+) -> language_tool_python.LanguageTool:
+    """Instances for the LanguageTool pool: clients of the configured or shared server in the remote modes, with
+    a fallback to an in-process server when it cannot be reached or started"""
+    if settings.LANGUAGE_TOOL_MODE != "local":
+        try:
+            if settings.LANGUAGE_TOOL_MODE == "remote":
+                server = get_shared_language_tool_server()
+                url = settings.LANGUAGE_TOOL_SERVER_URL.rstrip("/") + "/"
+                return SessionLanguageTool(language.value, url, server.session)
+            return get_shared_language_tool_server().client(language)
+        except Exception:
+            logger.exception(
+                "No LanguageTool server to share for %s, starting one in-process",
+                language.value,
+            )
+    return language_tool_python.LanguageTool(language.value)
+
+
+if __name__ == "__main__":
+    # Two "workers" sharing one server: the second attaches in milliseconds instead of starting its own JVM
+    import time
+
+    from backend.app.utils.default_article import default_article
+
+    servers = {
+        "first": SharedLanguageToolServer(),
+        "second": SharedLanguageToolServer(),
+    }
+    for name, server in servers.items():
+        start_time = time.perf_counter()
+        tool = server.client(LanguageToolLanguage.SLOVAK)
+        print(f"{name} process ready in {time.perf_counter() - start_time:.2f}s")
+
+        start_time = time.perf_counter()
+        for _ in range(5):
+            tool.check(default_article)
+        print(f"check: {(time.perf_counter() - start_time) / 5:.3f}s per call")
+    servers["first"].close()
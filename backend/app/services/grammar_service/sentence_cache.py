@@ -0,0 +1,366 @@
+import bisect
+import hashlib
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from functools import lru_cache
+
+from backend.app.core.config import settings
+from backend.app.services.grammar_service.language_tool_pool import (
+    LanguageToolPool,
+    get_language_tool_pool,
+)
+from backend.app.services.grammar_service.spell_prefilter import SpellPrefilter
+from backend.app.utils.language_enum import LanguageToolLanguage
+from backend.app.utils.tiered_cache import TieredCache
+
+# Candidate sentence ends: . ! ? or … followed by whitespace. A line break always ends one
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+|\s*\n\s*")
+# Quotes and brackets that may open a sentence before its first letter
+SENTENCE_OPENERS = "\"'„“”‚‘«»(["
+# Words that end with a period without ending the sentence, lowercase and without the final period
+ABBREVIATIONS = frozenset(
+    {
+        # Slovak
+        "a.s", "atď", "bc", "cca", "č", "čl", "doc", "dr", "gen", "hod", "ing", "judr", "kap", "kol", "mgr",
+        "mil", "min", "mld", "mudr", "nám", "napr", "obr", "ods", "p", "phdr", "písm", "pí", "pozn", "príp",
+        "prof", "resp", "rndr", "roč", "s.r.o", "sek", "spol", "st", "str", "sv", "tab", "tel", "tis", "tj",
+        "tzn", "tzv", "ul", "vr", "zb",
+        # English
+        "co", "corp", "e.g", "etc", "fig", "i.e", "inc", "jr", "ltd", "mr", "mrs", "ms", "no", "sr", "vs",
+        "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+    }
+)  # fmt: skip
+# Ordinals ("41. týždeň", "IV. kvartál") and initials ("J. Novák")
+NOT_SENTENCE_END = re.compile(r"\d+|[IVXLCDM]+|\w")
+
+# Joins the checked text into one LanguageTool call, a blank line keeps the parts from being read as one sentence
+SENTENCE_SEPARATOR = "\n\n"
+
+
+@dataclass(frozen=True)
+class GrammarMatch:
+    offset: int
+    length: int
+    replacements: list[str]
+    rule_id: str
+    message: str
+    context: str
+    context_offset: int
+
+
+@dataclass(frozen=True)
+class Sentence:
+    offset: int
+    text: str
+
+
+@dataclass(frozen=True)
+class CheckWindow:
+    """A run of sentences to check, with one sentence of context on each side"""
+
+    text_index: int
+    sentences: list[int]
+    text: str
+    # Offsets of the checked sentences in `text`, the rest is context
+    starts: list[int]
+    ends: list[int]
+
+
+def is_sentence_end(text: str, boundary: re.Match) -> bool:
+    """Whether a boundary candidate really ends a sentence. Unsure cases are not split, two sentences checked as
+    one are only cached less precisely while a wrong split makes LanguageTool see a new sentence
+    """
+    if "\n" in boundary.group():
+        return True
+
+    following = text[boundary.end() :].lstrip(SENTENCE_OPENERS)
+    if not following or not following[0].isupper():
+        return False
+
+    word = text[: boundary.start()].rsplit(maxsplit=1)[-1]
+    if not word.endswith("."):
+        return True
+    word = word.rstrip(".").lstrip(SENTENCE_OPENERS)
+    return not (
+        word.lower() in ABBREVIATIONS or NOT_SENTENCE_END.fullmatch(word) is not None
+    )
+
+
+def split_sentences(text: str) -> list[Sentence]:
+    sentences = []
+    start = 0
+    for boundary in SENTENCE_BOUNDARY.finditer(text):
+        if not is_sentence_end(text, boundary):
+            continue
+        if boundary.start() > start:
+            sentences.append(Sentence(start, text[start : boundary.start()]))
+        start = boundary.end()
+    if start < len(text):
+        sentences.append(Sentence(start, text[start:]))
+    return sentences
+
+
+def check_windows(
+    text_index: int,
+    text: str,
+    sentences: list[Sentence],
+    unchecked: list[bool],
+    max_chars: int,
+) -> list[CheckWindow]:
+    """A window for every run of unchecked sentences, extended by the sentence before and after it. Runs longer
+    than `max_chars` are cut into several windows, so they can be sharded"""
+    windows = []
+    i = 0
+    while i < len(sentences):
+        if not unchecked[i]:
+            i += 1
+            continue
+        first = i
+        size = 0
+        while i < len(sentences) and unchecked[i] and (i == first or size < max_chars):
+            size += len(sentences[i].text)
+            i += 1
+        before = sentences[max(first - 1, 0)]
+        after = sentences[min(i, len(sentences) - 1)]
+        start = before.offset
+        run = sentences[first:i]
+        windows.append(
+            CheckWindow(
+                text_index=text_index,
+                sentences=list(range(first, i)),
+                text=text[start : after.offset + len(after.text)],
+                starts=[sentence.offset - start for sentence in run],
+                ends=[sentence.offset - start + len(sentence.text) for sentence in run],
+            )
+        )
+    return windows
+
+
+class SentenceCheckCache:
+    """LanguageTool matches per sentence, keyed by (language, sentence and its neighbours). Checking a text only
+    sends the sentences that are not cached yet, each run of them with the sentence before and after it as
+    context, so re-checking an edited text costs about the size of the edit.
+
+    Matches in the context are dropped, they belong to the neighbours, as are matches spanning two sentences.
+    The unchecked text is easy to split: more than `shard_chars` of it is cut into contiguous shards of windows
+    that are checked in parallel on up to `shard_workers` pooled LanguageTool instances
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl: float = 86400,
+        shard_chars: int = 2000,
+        shard_workers: int = 1,
+        pool: LanguageToolPool | None = None,
+    ) -> None:
+        self.cache = TieredCache(max_entries=max_entries, ttl=ttl)
+        # The app's pool when None
+        self.pool = pool
+        self.shard_chars = shard_chars
+        self.shard_workers = shard_workers
+        # Separate from the grammar executor, whose threads wait for the shards
+        self._shard_executor = ThreadPoolExecutor(
+            shard_workers, thread_name_prefix="grammar-shard"
+        )
+
+    def check(
+        self,
+        text: str,
+        language: LanguageToolLanguage,
+        prefilter: SpellPrefilter | None = None,
+    ) -> list[GrammarMatch]:
+        """Matches for the whole text, offsets relative to `text`"""
+        return self.check_many([text], language, prefilter)[0]
+
+    def check_many(
+        self,
+        texts: list[str],
+        language: LanguageToolLanguage,
+        prefilter: SpellPrefilter | None = None,
+    ) -> list[list[GrammarMatch]]:
+        """Matches for each of the texts, offsets relative to their text. The sentences missing from the cache
+        are checked in a single LanguageTool call for all the texts.
+
+        With a prefilter, uncached sentences it passes are taken as having no matches without asking
+        LanguageTool. That is only right for corrections, which ignore what the pre-filter does not look at, so
+        these results are not cached"""
+        sentences = [split_sentences(text) for text in texts]
+        keys = [
+            [self._key(language, text_sentences, i) for i in range(len(text_sentences))]
+            for text_sentences in sentences
+        ]
+        cached = [[self.cache.get(key) for key in text_keys] for text_keys in keys]
+
+        windows = []
+        for t, (text, text_sentences) in enumerate(zip(texts, sentences, strict=True)):
+            for i, sentence in enumerate(text_sentences):
+                if (
+                    cached[t][i] is None
+                    and prefilter is not None
+                    and prefilter.passes(sentence.text, language)
+                ):
+                    cached[t][i] = []
+            unchecked = [matches is None for matches in cached[t]]
+            windows.extend(
+                check_windows(t, text, text_sentences, unchecked, self.shard_chars)
+            )
+
+        if windows:
+            checked = self._check_windows(windows, language)
+            for window, window_matches in zip(windows, checked, strict=True):
+                t = window.text_index
+                for i, matches in zip(window.sentences, window_matches, strict=True):
+                    cached[t][i] = [asdict(match) for match in matches]
+                    self.cache.set(keys[t][i], cached[t][i])
+                    if prefilter is not None and not matches:
+                        prefilter.learn(sentences[t][i].text, language)
+
+        return [
+            [
+                replace(GrammarMatch(**match), offset=sentence.offset + match["offset"])
+                for sentence, matches in zip(text_sentences, text_cached, strict=True)
+                for match in matches
+            ]
+            for text_sentences, text_cached in zip(sentences, cached, strict=True)
+        ]
+
+    def close(self) -> None:
+        self._shard_executor.shutdown(wait=True, cancel_futures=True)
+
+    def _check_windows(
+        self, windows: list[CheckWindow], language: LanguageToolLanguage
+    ) -> list[list[list[GrammarMatch]]]:
+        shards = self._shards(windows)
+        if len(shards) == 1:
+            return self._check_shard(windows, language)
+
+        checked = self._shard_executor.map(
+            lambda shard: self._check_shard(shard, language), shards
+        )
+        return [matches for shard_matches in checked for matches in shard_matches]
+
+    def _shards(self, windows: list[CheckWindow]) -> list[list[CheckWindow]]:
+        """Contiguous groups of windows of about the same length"""
+        total = sum(len(window.text) for window in windows)
+        count = min(
+            self.shard_workers, len(windows), math.ceil(total / self.shard_chars)
+        )
+        if count <= 1:
+            return [windows]
+
+        target = total / count
+        shards: list[list[CheckWindow]] = []
+        shard: list[CheckWindow] = []
+        size = 0
+        for window in windows:
+            shard.append(window)
+            size += len(window.text)
+            if size >= target and len(shards) < count - 1:
+                shards.append(shard)
+                shard = []
+                size = 0
+        if shard:
+            shards.append(shard)
+        return shards
+
+    def _check_shard(
+        self, windows: list[CheckWindow], language: LanguageToolLanguage
+    ) -> list[list[list[GrammarMatch]]]:
+        """One LanguageTool call for all the windows, the matches split back per checked sentence"""
+        starts = []
+        position = 0
+        for window in windows:
+            starts.append(position)
+            position += len(window.text) + len(SENTENCE_SEPARATOR)
+
+        with (self.pool or get_language_tool_pool()).acquire(language) as tool:
+            matches = tool.check(SENTENCE_SEPARATOR.join(w.text for w in windows))
+
+        per_sentence: list[list[list[GrammarMatch]]] = [
+            [[] for _ in window.sentences] for window in windows
+        ]
+        for match in matches:
+            w = bisect.bisect_right(starts, match.offset) - 1
+            window = windows[w]
+            offset = match.offset - starts[w]
+            i = bisect.bisect_right(window.starts, offset) - 1
+            # Before the first checked sentence is context, which also holds the artificial paragraph start of
+            # the window. A match reaching past the sentence is not about it alone
+            if i < 0 or offset + match.errorLength > window.ends[i]:
+                continue
+            per_sentence[w][i].append(
+                GrammarMatch(
+                    offset=offset - window.starts[i],
+                    length=match.errorLength,
+                    replacements=list(match.replacements),
+                    rule_id=match.ruleId,
+                    message=match.message,
+                    context=match.context,
+                    context_offset=match.offsetInContext,
+                )
+            )
+        return per_sentence
+
+    @staticmethod
+    def _key(language: LanguageToolLanguage, sentences: list[Sentence], i: int) -> str:
+        # The neighbours are part of the key, they are the context the sentence was checked in
+        before = sentences[i - 1].text if i > 0 else ""
+        after = sentences[i + 1].text if i + 1 < len(sentences) else ""
+        context = "\0".join((before, sentences[i].text, after))
+        digest = hashlib.sha256(context.encode()).hexdigest()
+        return f"{language.value}:{digest}"
+
+
+@lru_cache
+def get_sentence_check_cache() -> SentenceCheckCache:
+    return SentenceCheckCache(
+        max_entries=settings.GRAMMAR_CACHE_MAX_SENTENCES,
+        shard_chars=settings.GRAMMAR_SHARD_CHARS,
+        # The pool is sized for them
+        shard_workers=settings.GRAMMAR_SHARD_WORKERS,
+    )
+
+
+if __name__ == "__main__":
+    # Re-checking an article after editing one sentence only sends that sentence to LanguageTool, and a long body
+    # sharded over N instances (argument, 4 by default) against the same body on one
+    import sys
+    import time
+
+    from backend.app.services.grammar_service.language_tool_server import (
+        language_tool_factory,
+    )
+    from backend.app.utils.default_article import default_article
+
+    shard_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    language = LanguageToolLanguage.SLOVAK
+    pool = LanguageToolPool(
+        [language], size=shard_workers, factory=language_tool_factory
+    )
+    pool.start()
+    cache = SentenceCheckCache(pool=pool)
+
+    start_time = time.perf_counter()
+    cache.check(default_article, language)
+    print(f"First check: {time.perf_counter() - start_time:.3f}s")
+
+    edited = default_article.replace(".", ". Toto je nová veta.", 1)
+    start_time = time.perf_counter()
+    cache.check(edited, language)
+    print(f"After a one sentence edit: {time.perf_counter() - start_time:.3f}s")
+    print(cache.cache.stats.as_dict())
+    cache.close()
+
+    body = "\n\n".join([default_article] * 4)
+    for workers in (1, shard_workers):
+        cache = SentenceCheckCache(shard_workers=workers, pool=pool)
+        start_time = time.perf_counter()
+        cache.check(body, language)
+        print(
+            f"{len(body)} characters on {workers} instance(s): {time.perf_counter() - start_time:.3f}s"
+        )
+        cache.close()
+    pool.close()
@@ -0,0 +1,145 @@
+import codecs
+import logging
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any
+
+from backend.app.core.config import settings
+from backend.app.utils.language_enum import LanguageToolLanguage
+
+logger = logging.getLogger(__name__)
+
+WORD = re.compile(r"[^\W\d_]+")
+
+# Dictionary file names tried for each language, the LanguageTool code first and then the hunspell locale
+# (e.g. sk_SK.dic in /usr/share/hunspell)
+DICTIONARY_NAMES = {
+    LanguageToolLanguage.SLOVAK: ("sk", "sk_SK"),
+    LanguageToolLanguage.ENGLISH: ("en-US", "en_US"),
+}
+
+
+@dataclass
+class PrefilterStats:
+    passed: int = 0
+    escalated: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        sentences = self.passed + self.escalated
+        return {
+            **asdict(self),
+            "pass_rate": self.passed / sentences if sentences else 0.0,
+        }
+
+
+class SpellPrefilter:
+    """In-process word lookup that decides whether a sentence needs LanguageTool at all. A sentence passes when
+    every lowercase word in it is known, capitalized words are never corrected by correct_text so they are not
+    looked at.
+
+    Known words come from a dictionary in `dictionary_dir` named after the language (see DICTIONARY_NAMES), either
+    a UTF-8 word list or a hunspell .dic in the encoding its .aff declares, affix flags are ignored. And from every sentence LanguageTool found no issue in, up to `max_learned` words per language.
+    Grammar rules that fire on correctly spelled words are missed for passed sentences
+    """
+
+    def __init__(
+        self, dictionary_dir: str | None = None, max_learned: int = 500000
+    ) -> None:
+        self.dictionary_dir = dictionary_dir
+        self.max_learned = max_learned
+        self.stats = PrefilterStats()
+        self._words: dict[LanguageToolLanguage, set[str]] = {}
+        self._learned: dict[LanguageToolLanguage, int] = {}
+        self._lock = threading.Lock()
+
+    def suspect_words(self, sentence: str, language: LanguageToolLanguage) -> list[str]:
+        known = self._known_words(language)
+        return [
+            word
+            for word in WORD.findall(sentence)
+            if word.islower() and word not in known
+        ]
+
+    def passes(self, sentence: str, language: LanguageToolLanguage) -> bool:
+        passed = not self.suspect_words(sentence, language)
+        with self._lock:
+            if passed:
+                self.stats.passed += 1
+            else:
+                self.stats.escalated += 1
+        return passed
+
+    def learn(self, sentence: str, language: LanguageToolLanguage) -> None:
+        """Remember the words of a sentence LanguageTool found no issue in"""
+        known = self._known_words(language)
+        with self._lock:
+            for word in WORD.findall(sentence):
+                if self._learned[language] >= self.max_learned:
+                    return
+                if word.islower() and word not in known:
+                    known.add(word)
+                    self._learned[language] += 1
+
+    def _known_words(self, language: LanguageToolLanguage) -> set[str]:
+        with self._lock:
+            if language not in self._words:
+                self._words[language] = self._load(language)
+                self._learned[language] = 0
+            return self._words[language]
+
+    def _load(self, language: LanguageToolLanguage) -> set[str]:
+        if not self.dictionary_dir:
+            return set()
+
+        paths = [
+            os.path.join(self.dictionary_dir, f"{name}.dic")
+            for name in DICTIONARY_NAMES[language]
+        ]
+        path = next((path for path in paths if os.path.exists(path)), None)
+        if path is None:
+            logger.warning(
+                "No spelling dictionary for %s, looked for %s",
+                language.value,
+                ", ".join(paths),
+            )
+            return set()
+
+        words = set()
+        with open(path, encoding=dictionary_encoding(path)) as file:
+            for line in file:
+                word = line.split("/", 1)[0].strip()
+                # The first line of a hunspell .dic is the word count
+                if word and not word.isdigit():
+                    words.add(word.lower())
+        logger.info("Loaded %d words for %s", len(words), language.value)
+        return words
+
+
+def dictionary_encoding(path: str) -> str:
+    """Encoding of a hunspell .dic, declared by the SET line of the .aff next to it. UTF-8 without an .aff"""
+    aff_path = os.path.splitext(path)[0] + ".aff"
+    if not os.path.exists(aff_path):
+        return "utf-8"
+
+    # The SET line is ASCII whatever the encoding of the rest of the file
+    with open(aff_path, encoding="ascii", errors="replace") as file:
+        for line in file:
+            if line.startswith("SET "):
+                encoding = line.split()[1].removeprefix("microsoft-")
+                try:
+                    return codecs.lookup(encoding).name
+                except LookupError:
+                    logger.warning("Unknown encoding %s in %s", encoding, aff_path)
+                    break
+    return "utf-8"
+
+
+@lru_cache
+def get_spell_prefilter() -> SpellPrefilter | None:
+    """None when the pre-filter is turned off, every sentence then goes to LanguageTool"""
+    if not settings.SPELL_PREFILTER:
+        return None
+    return SpellPrefilter(settings.SPELL_DICTIONARY_DIR)
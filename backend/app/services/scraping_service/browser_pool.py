@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+
+from playwright.async_api import Browser, Page, Playwright, async_playwright
+
+from backend.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PooledBrowser:
+    browser: Browser
+    pages: int = 0
+
+
+class BrowserPool:
+    """`size` Chromium processes launched once and shared by all scrapes. Each scrape gets a fresh context (its
+    own cookies and cache) on a free browser and waits when all of them are busy. A browser is relaunched after
+    `pages_per_browser` pages, so its memory does not keep growing, or when it has crashed
+    """
+
+    def __init__(
+        self, size: int = 2, pages_per_browser: int = 50, headless: bool = True
+    ) -> None:
+        self.size = size
+        self.pages_per_browser = pages_per_browser
+        self.headless = headless
+        self._playwright: Playwright | None = None
+        self._idle: asyncio.Queue[PooledBrowser] | None = None
+        self._start_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        async with self._start_lock:
+            if self._playwright is not None:
+                return
+            playwright = await async_playwright().start()
+            idle: asyncio.Queue[PooledBrowser] = asyncio.Queue()
+            try:
+                for _ in range(self.size):
+                    idle.put_nowait(await self._launch(playwright))
+            except BaseException:
+                # Not started, the next start() launches all browsers again instead of leaving the pool short
+                while not idle.empty():
+                    await idle.get_nowait().browser.close()
+                await playwright.stop()
+                raise
+            self._playwright = playwright
+            self._idle = idle
+
+    async def close(self) -> None:
+        async with self._start_lock:
+            if self._playwright is None:
+                return
+            # Browsers still lent out are closed together with playwright
+            while not self._idle.empty():
+                pooled = self._idle.get_nowait()
+                await pooled.browser.close()
+            await self._playwright.stop()
+            self._playwright = None
+            self._idle = None
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """A page in a new context, started on the first use when the pool was not started in the lifespan"""
+        await self.start()
+        idle = self._idle
+        pooled = await idle.get()
+        try:
+            if not pooled.browser.is_connected():
+                logger.warning("Pooled browser disconnected, relaunching")
+                pooled = await self._launch(self._playwright)
+
+            context = await pooled.browser.new_context()
+            try:
+                yield await context.new_page()
+            finally:
+                pooled.pages += 1
+                await context.close()
+
+            if pooled.pages >= self.pages_per_browser:
+                await pooled.browser.close()
+                pooled = await self._launch(self._playwright)
+        finally:
+            idle.put_nowait(pooled)
+
+    async def _launch(self, playwright: Playwright) -> PooledBrowser:
+        browser = await playwright.chromium.launch(headless=self.headless)
+        return PooledBrowser(browser)
+
+
+@lru_cache
+def get_browser_pool() -> BrowserPool:
+    return BrowserPool(
+        size=settings.BROWSER_POOL_SIZE,
+        pages_per_browser=settings.BROWSER_PAGES_PER_BROWSER,
+    )
@@ -0,0 +1,159 @@
+import re
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import litellm
+
+from backend.app.services.ai_service.lm_pool import MODELS
+
+# Prompts are sized for the cheaper model, o3-mini uses a tokenizer of the same family
+TOKENIZER_MODEL = MODELS["gpt-4.1-mini"]
+
+IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+BARE_URL = re.compile(r"<?https?://\S+>?")
+# Jina puts the source URL and a content label in front of the page markdown
+JINA_HEADER = re.compile(r"^(URL Source|Markdown Content):.*$")
+# A line made only of links, list markers and separators, e.g. navigation menus or "related articles" lists
+LINK_ONLY_LINE = re.compile(r"^[\s*+\-|•>#]*(\[[^\]]*\]\([^)]*\)[\s*+\-|•,·/]*)+$")
+# Whole lines of the usual page chrome, in Slovak and English. Anchored, so content that only mentions cookies,
+# a newsletter or a copyright sign is kept
+BOILERPLATE_LINE = re.compile(
+    r"^[\s*+\-|•>#]*(?:"
+    r"(?:táto|naša|this|our) (?:webová )?(?:stránka|web|website|site) (?:používa|uses) (?:súbory )?cookies?\b.*"
+    r"|(?:prijať|odmietnuť) všetk[ye](?: cookies)?|(?:accept|reject) all(?: cookies)?"
+    r"|(?:nastavenia|správa) (?:súborov )?cookies|cookie (?:settings|preferences)|súhlas so spracovaním\b.*"
+    r"|(?:zásady )?ochran[ay] osobných údajov|privacy policy|podmienky používania|terms of (?:use|service)"
+    r"|(?:odoberať|odber|prihláste sa na odber|prihlásiť sa na odber) (?:noviniek|newslettera?)"
+    r"|newsletter|subscribe(?: to (?:our|the) newsletter)?"
+    r"|zdieľať(?: na \w+)?|share(?: on \w+)?|prihlásiť sa|odhlásiť sa|log in|sign in|sign up|registrácia"
+    r"|(?:©|\(c\)|copyright\b).*"
+    r"|.*\b(?:všetky práva vyhradené|all rights reserved)"
+    r")[\s.!:|]*$",
+    re.IGNORECASE,
+)
+# Compacted content is cached, changing the rules above has to change this too
+COMPACTION_VERSION = 2
+BOILERPLATE_MAX_LENGTH = 120
+
+
+@dataclass
+class CompactedContent:
+    text: str
+    raw_tokens: int
+    tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.raw_tokens - self.tokens
+
+
+@dataclass
+class CompactionStats:
+    articles: int = 0
+    raw_tokens: int = 0
+    tokens: int = 0
+
+    def add(self, compacted: CompactedContent) -> None:
+        self.articles += 1
+        self.raw_tokens += compacted.raw_tokens
+        self.tokens += compacted.tokens
+
+    def as_dict(self) -> dict[str, Any]:
+        saved = self.raw_tokens - self.tokens
+        return {
+            **asdict(self),
+            "tokens_saved": saved,
+            "tokens_saved_per_article": saved / self.articles if self.articles else 0.0,
+        }
+
+
+compaction_stats = CompactionStats()
+
+
+def count_tokens(text: str) -> int:
+    return litellm.token_counter(model=TOKENIZER_MODEL, text=text)
+
+
+def is_boilerplate(line: str) -> bool:
+    return len(line) <= BOILERPLATE_MAX_LENGTH and bool(BOILERPLATE_LINE.match(line))
+
+
+def clean_block(block: str) -> str:
+    lines = []
+    for line in block.splitlines():
+        line = line.strip()
+        if (
+            JINA_HEADER.match(line)
+            or LINK_ONLY_LINE.match(line)
+            or is_boilerplate(line)
+        ):
+            continue
+        # Links and images cost a lot of tokens and carry nothing the prompts use
+        line = BARE_URL.sub("", LINK.sub(r"\1", IMAGE.sub("", line))).strip()
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def fit_to_budget(blocks: list[str], token_budget: int) -> list[str]:
+    """Keep the leading blocks that fit into the budget, news articles put the important facts first"""
+    kept: list[str] = []
+    remaining = token_budget
+    for block in blocks:
+        tokens = count_tokens(block)
+        if tokens > remaining:
+            if not kept:
+                # Not even the first block fits, cut it proportionally
+                kept.append(block[: len(block) * remaining // tokens])
+            break
+        kept.append(block)
+        remaining -= tokens
+    return kept
+
+
+def compact_content(text: str, token_budget: int | None = None) -> CompactedContent:
+    """Strip page boilerplate, link-only lines and repeated blocks from the scraped markdown and keep it within
+    token_budget"""
+    blocks = []
+    seen = set()
+    for block in re.split(r"\n\s*\n", text):
+        block = clean_block(block)
+        key = re.sub(r"\s+", " ", block).lower()
+        if not block or key in seen:
+            continue
+        seen.add(key)
+        blocks.append(block)
+
+    if token_budget is not None:
+        blocks = fit_to_budget(blocks, token_budget)
+
+    compacted = "\n\n".join(blocks)
+    return CompactedContent(
+        text=compacted, raw_tokens=count_tokens(text), tokens=count_tokens(compacted)
+    )
+
+
+if __name__ == "__main__":
+    from backend.app.utils.default_article import default_article
+
+    page = "\n\n".join(
+        [
+            "Title: Priemerné ceny pohonných látok v SR\n\nURL Source: https://slovak.statistics.sk/\n\n"
+            "Markdown Content:",
+            "* [Domov](https://slovak.statistics.sk/)\n* [Štatistiky](https://slovak.statistics.sk/stat)\n"
+            "* [Kontakt](https://slovak.statistics.sk/kontakt)",
+            "Táto stránka používa cookies. [Prijať všetky](https://slovak.statistics.sk/cookies)",
+            default_article,
+            "![Graf](https://slovak.statistics.sk/graf.png)",
+            "[Facebook](https://facebook.com) | [X](https://x.com) | [LinkedIn](https://linkedin.com)",
+            default_article,
+            "© 2024 Štatistický úrad SR. Všetky práva vyhradené.",
+        ]
+    )
+
+    for budget in (None, 500):
+        result = compact_content(page, budget)
+        print(
+            f"budget {budget}: {result.raw_tokens} -> {result.tokens} tokens, {result.tokens_saved} saved"
+        )
@@ -0,0 +1,58 @@
+import logging
+from collections.abc import Callable
+from functools import lru_cache
+
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+
+from backend.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Fastest first. lxml is C-backed, html.parser ships with Python and is the fallback
+PARSERS = ("lxml", "html.parser")
+
+
+class AnyOf(SoupStrainer):
+    """Keeps the elements (with everything inside them) that any of the strainers keeps, so one partial parse
+    can collect the title, perex and body nodes of a page at once"""
+
+    def __init__(self, *strainers: SoupStrainer) -> None:
+        super().__init__()
+        self.strainers = strainers
+
+    def allow_tag_creation(
+        self, nsprefix: str | None, name: str, attrs: dict[str, str] | None
+    ) -> bool:
+        return any(
+            strainer.allow_tag_creation(nsprefix, name, attrs)
+            for strainer in self.strainers
+        )
+
+    def allow_string_creation(self, string: str) -> bool:
+        # Text outside of the kept elements is never read
+        return False
+
+
+def has_class(name: str) -> Callable[[str | None], bool]:
+    """Attribute filter for strainers, which see the class attribute as one unsplit string"""
+    return lambda value: value is not None and name in value.split()
+
+
+@lru_cache
+def html_parser_name() -> str:
+    """HTML_PARSER, or for "auto" the fastest one installed. A parser that is not installed falls back to the
+    next one"""
+    preferred = PARSERS if settings.HTML_PARSER == "auto" else (settings.HTML_PARSER,)
+    for name in (*preferred, "html.parser"):
+        try:
+            BeautifulSoup("", name)
+            return name
+        except FeatureNotFound:
+            if settings.HTML_PARSER != "auto":
+                logger.warning("HTML parser %s is not installed", name)
+    return "html.parser"
+
+
+def parse_html(html: str | bytes, only: SoupStrainer | None = None) -> BeautifulSoup:
+    """Parse with the configured parser. With `only`, just the elements it keeps are built"""
+    return BeautifulSoup(html, html_parser_name(), parse_only=only)
@@ -1,9 +1,66 @@
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+from urllib.parse import urlparse
+
 import validators
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from markdownify import MarkdownConverter as mc
-from playwright.async_api import async_playwright
+from playwright.async_api import Page, Request, Route
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from validators import ValidationError
 
+from backend.app.services.scraping_service.browser_pool import get_browser_pool
+from backend.app.services.scraping_service.html_parser import has_class, parse_html
+
+logger = logging.getLogger(__name__)
+
+# Only three nodes of the page are read, nothing that just renders it has to load
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+
+# Parent of the title, keynotes and body, once it is in the DOM there is nothing more to wait for
+PUBLICATION_SELECTOR = "div.publication-detail"
+PUBLICATION_TIMEOUT_MS = 5000
+# Only the publication is parsed, the portal layout around it is skipped
+PUBLICATION_STRAINER = SoupStrainer(
+    "div", attrs={"class": has_class("publication-detail")}
+)
+
+
+@dataclass
+class PageLoad:
+    html: str
+    seconds: float
+    bytes: int
+    requests: int
+    blocked: int
+
+
+@dataclass
+class PageLoadStats:
+    pages: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+    blocked: int = 0
+
+    def add(self, load: PageLoad) -> None:
+        self.pages += 1
+        self.seconds += load.seconds
+        self.bytes += load.bytes
+        self.blocked += load.blocked
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "seconds_per_page": self.seconds / self.pages if self.pages else 0.0,
+            "bytes_per_page": self.bytes / self.pages if self.pages else 0.0,
+        }
+
+
+page_load_stats = PageLoadStats()
+
 
 def check_url(url: str) -> bool:
     result = validators.url(url)
@@ -17,38 +74,121 @@ def md(soup: BeautifulSoup, **options) -> str:
     return mc(**options).convert_soup(soup)
 
 
+def site_of(host: str) -> str:
+    # slovak.statistics.sk and www.statistics.sk are the same site, the rest is third-party
+    return ".".join(host.split(".")[-2:])
+
+
+async def load_page(page: Page, url: str, lightweight: bool = True) -> PageLoad:
+    """Open the url and return its HTML. Lightweight loads block heavy and third-party resources and return as
+    soon as the publication is in the DOM, the others wait for the full load event"""
+    site = site_of(urlparse(url).hostname or "")
+    blocked = 0
+    finished: list[Request] = []
+
+    async def intercept(route: Route) -> None:
+        nonlocal blocked
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or (
+            site_of(urlparse(request.url).hostname or "") != site
+        ):
+            blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    page.on("requestfinished", finished.append)
+    if lightweight:
+        await page.route("**/*", intercept)
+
+    start_time = time.perf_counter()
+    if lightweight:
+        await page.goto(url, wait_until="domcontentloaded")
+        try:
+            await page.wait_for_selector(
+                PUBLICATION_SELECTOR, state="attached", timeout=PUBLICATION_TIMEOUT_MS
+            )
+        except PlaywrightTimeoutError:
+            # Not a publication page, the DOM is read as it is
+            logger.warning("No publication found on %s", url)
+    else:
+        await page.goto(url, wait_until="load")
+    html = await page.content()
+    seconds = time.perf_counter() - start_time
+
+    sizes = await asyncio.gather(*(request.sizes() for request in finished))
+    return PageLoad(
+        html=html,
+        seconds=seconds,
+        bytes=sum(
+            size["responseBodySize"] + size["responseHeadersSize"] for size in sizes
+        ),
+        requests=len(finished),
+        blocked=blocked,
+    )
+
+
 async def scrape(url: str) -> str:
     if not check_url(url):
         raise ValueError("The argument is not a valid URL")
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        await page.goto(url)
-        html = await page.content()
-
-        soup = BeautifulSoup(html, "html.parser")
-
-        # Title
-        title = soup.select_one(
-            "#layoutContainers > div.component-container.ibm2ColRightMain.ibmDndColumn.id-Z7_Q7I8BB1A00BL30IJKSNHCF2G15 > div > div > div > div.body-content > div.publication-detail > h1"
-        )
-        # Keynotes
-        keynotes = soup.select_one(
-            "#layoutContainers > div.component-container.ibm2ColRightMain.ibmDndColumn.id-Z7_Q7I8BB1A00BL30IJKSNHCF2G15 > div > div > div > div.body-content > div.publication-detail > div.publ-detail-item > div.publ-detail-keynotes"
-        )
-        # Body
-        body = soup.select_one(
-            "#layoutContainers > div.component-container.ibm2ColRightMain.ibmDndColumn.id-Z7_Q7I8BB1A00BL30IJKSNHCF2G15 > div > div > div > div.body-content > div.publication-detail > div.publ-detail-item > div.publ-detail-text > div.body-text"
-        )
-
-        # Convert each extracted component to markdown
-        title_md = md(title) if title else "Title not found"
-        keynotes_md = md(keynotes) if keynotes else "Keynotes not found"
-        body_md = md(body) if body else "Body not found"
-
-        # Combine markdown content
-        result_md = (
-            f"## Title\n{title_md}\n## Keynotes\n{keynotes_md}\n## Body\n{body_md}"
-        )
-        return result_md
+    async with get_browser_pool().page() as page:
+        load = await load_page(page, url)
+    page_load_stats.add(load)
+    logger.info(
+        "Loaded %s in %.2fs, %d bytes in %d requests, %d blocked",
+        url,
+        load.seconds,
+        load.bytes,
+        load.requests,
+        load.blocked,
+    )
+
+    return publication_markdown(parse_html(load.html, PUBLICATION_STRAINER))
+
+
+def publication_markdown(soup: BeautifulSoup) -> str:
+    # Title
+    title = soup.select_one("div.publication-detail > h1")
+    # Keynotes
+    keynotes = soup.select_one(
+        "div.publication-detail > div.publ-detail-item > div.publ-detail-keynotes"
+    )
+    # Body
+    body = soup.select_one(
+        "div.publication-detail > div.publ-detail-item > div.publ-detail-text > div.body-text"
+    )
+
+    # Convert each extracted component to markdown
+    title_md = md(title) if title else "Title not found"
+    keynotes_md = md(keynotes) if keynotes else "Keynotes not found"
+    body_md = md(body) if body else "Body not found"
+
+    # Combine markdown content
+    result_md = f"## Title\n{title_md}\n## Keynotes\n{keynotes_md}\n## Body\n{body_md}"
+    return result_md
+
+
+if __name__ == "__main__":
+    # Wall time and bytes per page with the full load (before) and the lightweight one (after)
+    from backend.app.utils.default_article import default_article_url
+
+    async def benchmark(scrapes: int = 5) -> None:
+        pool = get_browser_pool()
+        await pool.start()
+        for lightweight in (False, True):
+            loads = []
+            for _ in range(scrapes):
+                async with pool.page() as page:
+                    loads.append(
+                        await load_page(page, default_article_url, lightweight)
+                    )
+            print(
+                f"{'lightweight' if lightweight else 'full load'}: "
+                f"{sum(load.seconds for load in loads) / scrapes:.2f}s, "
+                f"{sum(load.bytes for load in loads) / scrapes / 1024:.0f} KiB, "
+                f"{sum(load.blocked for load in loads) / scrapes:.0f} requests blocked per page"
+            )
+        await pool.close()
+
+    asyncio.run(benchmark())
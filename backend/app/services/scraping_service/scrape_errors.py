@@ -0,0 +1,21 @@
+class ScrapeError(Exception):
+    """A URL could not be scraped"""
+
+    def __init__(self, url: str, reason: str) -> None:
+        super().__init__(f"Scraping {url} failed: {reason}")
+        self.url = url
+        self.reason = reason
+
+
+class ScrapeTimeoutError(ScrapeError):
+    pass
+
+
+class ScrapeConnectionError(ScrapeError):
+    pass
+
+
+class ScrapeHTTPError(ScrapeError):
+    def __init__(self, url: str, status: int, reason: str) -> None:
+        super().__init__(url, f"{status} {reason}")
+        self.status = status
@@ -6,7 +6,7 @@ from backend.app.services.ai_service.response_models import ArticleResponse
 
 def clean_graph_data(article: ArticleResponse) -> ArticleResponse:
     if not (article.gen_graph and article.graph_data):
-        return
+        return article
 
     graph_labels_key = "x_vals" if article.graph_type == "scatter" else "labels"
     graph_values_key = "y_vals" if article.graph_type == "scatter" else "values"
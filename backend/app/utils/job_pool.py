@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import Enum
+from functools import lru_cache
+from typing import Any
+
+from backend.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobPoolFullError(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    key: str
+    run: Callable[["Job"], Awaitable[Any]]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.QUEUED
+    partial: dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.FAILED)
+
+
+class JobPool:
+    """Runs submitted jobs on a fixed number of worker tasks. A job submitted with the key of a job that is
+    still queued or running is not started again, the running one is returned instead. Finished jobs are kept
+    for `result_ttl` seconds so their results can be fetched"""
+
+    def __init__(
+        self, workers: int = 4, max_queued: int = 100, result_ttl: float = 3600
+    ) -> None:
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=max_queued)
+        self._jobs: dict[str, Job] = {}
+        self._active: dict[str, Job] = {}
+        self._worker_tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._worker_tasks:
+            return
+        self._worker_tasks = [
+            asyncio.create_task(self._work(), name=f"job-worker:{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def submit(self, key: str, run: Callable[[Job], Awaitable[Any]]) -> Job:
+        self._purge_finished()
+
+        active = self._active.get(key)
+        if active is not None:
+            return active
+
+        job = Job(key=key, run=run)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobPoolFullError(
+                f"Too many queued jobs ({self._queue.maxsize}), try again later"
+            )
+
+        self._jobs[job.id] = job
+        self._active[key] = job
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = JobStatus.RUNNING
+            try:
+                job.result = await job.run(job)
+                job.status = JobStatus.DONE
+            except asyncio.CancelledError:
+                job.status = JobStatus.FAILED
+                job.error = "The server shut down before the job finished"
+                raise
+            except Exception as e:
+                logger.exception("Job %s (%s) failed", job.id, job.key)
+                job.status = JobStatus.FAILED
+                job.error = str(getattr(e, "detail", e))
+            finally:
+                job.finished_at = time.time()
+                self._active.pop(job.key, None)
+                self._queue.task_done()
+
+    def _purge_finished(self) -> None:
+        expired_before = time.time() - self.result_ttl
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and job.finished_at < expired_before:
+                del self._jobs[job_id]
+
+
+@lru_cache
+def get_job_pool() -> JobPool:
+    return JobPool(
+        workers=settings.JOB_WORKERS,
+        max_queued=settings.JOB_QUEUE_SIZE,
+        result_ttl=settings.JOB_RESULT_TTL,
+    )
+
+
+if __name__ == "__main__":
+    # Submitting the same key while it runs returns the running job, the pool never runs more than `workers`
+    # jobs at a time
+
+    async def demo() -> None:
+        pool = JobPool(workers=2)
+        pool.start()
+        running = 0
+        max_running = 0
+
+        async def run(job: Job) -> str:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.05)
+            job.partial["halfway"] = True
+            await asyncio.sleep(0.05)
+            running -= 1
+            return job.key
+
+        jobs = [pool.submit(f"article:{i % 5}", run) for i in range(20)]
+        assert len({job.id for job in jobs}) == 5
+        while not all(job.finished for job in jobs):
+            await asyncio.sleep(0.01)
+        assert max_running == 2
+        assert all(job.result == job.key for job in jobs)
+        await pool.stop()
+        print("20 submissions, 5 jobs run, at most 2 at a time")
+
+    asyncio.run(demo())
@@ -1,51 +1,134 @@
-from fastapi_cache import FastAPICache
+import asyncio
+import hashlib
+import logging
+from functools import lru_cache, partial
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 from backend.app.core.config import settings
+from backend.app.services.scraping_service.content_compactor import (
+    COMPACTION_VERSION,
+    compact_content,
+    compaction_stats,
+)
 from backend.app.services.scraping_service.jina_scraper import jina_scrape
 from backend.app.services.scraping_service.playwright_scraper import scrape
 from backend.app.utils.default_article import default_article
+from backend.app.utils.single_flight import SingleFlight
+from backend.app.utils.stale_while_revalidate import StaleWhileRevalidateCache
+from backend.app.utils.tiered_cache import TieredCache
+
+logger = logging.getLogger(__name__)
+
+scrape_flights = SingleFlight()
+
+# Query parameters that only track where a visitor came from, the page is the same without them
+TRACKING_PARAMETERS = {"fbclid", "gclid", "mc_cid", "mc_eid"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """One cache key for the spellings of the same page: lowercase scheme and host, no default port, fragment,
+    tracking parameters or trailing slash, sorted query"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(
+        sorted(
+            (name, value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if name not in TRACKING_PARAMETERS and not name.startswith("utm_")
+        )
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+@lru_cache
+def get_scrape_cache() -> TieredCache:
+    return TieredCache(
+        max_entries=settings.SCRAPE_CACHE_MAX_ENTRIES,
+        ttl=settings.SCRAPE_CACHE_TTL,
+        path=settings.SCRAPE_CACHE_PATH,
+        table="scrapes",
+    )
+
+
+@lru_cache
+def get_article_cache() -> StaleWhileRevalidateCache:
+    return StaleWhileRevalidateCache(
+        get_scrape_cache(),
+        soft_ttl=settings.SCRAPE_CACHE_SOFT_TTL,
+        flights=scrape_flights,
+    )
+
+
+@lru_cache
+def get_storm_cache() -> StaleWhileRevalidateCache:
+    return StaleWhileRevalidateCache(
+        TieredCache(
+            max_entries=64,
+            ttl=settings.STORM_CACHE_TTL,
+            path=settings.SCRAPE_CACHE_PATH,
+            table="storm_articles",
+        ),
+        soft_ttl=settings.STORM_CACHE_SOFT_TTL,
+    )
 
 
 async def cache_or_scrape(
     url: str,
     default_article_url: str,
+    compact: bool = True,
 ) -> str:
+    """Scraped content of the url, by default compacted to what is worth sending to the prompts. The raw and
+    the compacted content are cached side by side in the scrape cache"""
+    scraped_article = await cache_or_scrape_raw(url, default_article_url)
+    if not compact:
+        return scraped_article
+
+    # Keyed by the content, a refreshed page gets compacted again
+    token_budget = settings.SCRAPED_CONTENT_TOKEN_BUDGET
+    content_hash = hashlib.sha256(scraped_article.encode()).hexdigest()
+    compact_cache_key = (
+        f"article:compact:{COMPACTION_VERSION}:{token_budget}:{content_hash}"
+    )
+    cached_content = await get_scrape_cache().aget(compact_cache_key)
+    if cached_content:
+        return cached_content
+
+    # Tokenizing the whole page takes long enough to stall the event loop
+    compacted = await asyncio.to_thread(compact_content, scraped_article, token_budget)
+    compaction_stats.add(compacted)
+    logger.info(
+        "Compacted %s: %d -> %d tokens (%d saved)",
+        url,
+        compacted.raw_tokens,
+        compacted.tokens,
+        compacted.tokens_saved,
+    )
+
+    get_scrape_cache().set(compact_cache_key, compacted.text)
+    return compacted.text
+
+
+async def cache_or_scrape_raw(
+    url: str,
+    default_article_url: str,
+) -> str:
+    if url == default_article_url:
+        return default_article
+
+    # Concurrent requests for a page that is not cached yet wait for one scrape, an outdated page is served while
+    # it is scraped again. A failed scrape is not cached, the next request tries again
+    cache_key = f"article:{normalize_url(url)}"
+    return await get_article_cache().get(cache_key, partial(scrape_url, url))
+
+
+async def scrape_url(url: str) -> str:
     if settings.SCRAPER == "jina":
-        cache_key = f"article:{url}"
-        default_cache_key = f"article:{default_article_url}"
-        cached_content = await FastAPICache.get_backend().get(cache_key)
-
-        if not cached_content:
-            if url == default_article_url:
-                scraped_article = default_article
-                await FastAPICache.get_backend().set(
-                    default_cache_key, scraped_article, expire=3600
-                )
-            else:
-                scraped_article = await jina_scrape(url)
-                await FastAPICache.get_backend().set(
-                    cache_key, scraped_article, expire=3600
-                )
-        else:
-            scraped_article = cached_content
-
-    elif settings.SCRAPER == "playwright":
-        cache_key = f"article:{url}"
-        default_cache_key = f"article:{default_article_url}"
-        cached_content = await FastAPICache.get_backend().get(cache_key)
-
-        if not cached_content:
-            if url == default_article_url:
-                scraped_article = default_article
-                await FastAPICache.get_backend().set(
-                    default_cache_key, scraped_article, expire=3600
-                )
-            else:
-                scraped_article = await scrape(url)
-                await FastAPICache.get_backend().set(
-                    cache_key, scraped_article, expire=3600
-                )
-        else:
-            scraped_article = cached_content
-
-    return scraped_article
+        return await jina_scrape(url)
+    if settings.SCRAPER == "playwright":
+        return await scrape(url)
+    raise ValueError(f"Unknown scraper '{settings.SCRAPER}'")
@@ -0,0 +1,62 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one run of the work: the first caller starts it, the others
+    await its result, or its exception. Nothing is kept once it finishes, caching the result is up to the work.
+
+    The work runs as its own task, so a caller that gets cancelled does not cancel it for the others
+    """
+
+    def __init__(self) -> None:
+        self.coalesced = 0
+        self._in_flight: dict[str, asyncio.Task] = {}
+
+    async def run(self, key: str, work: Callable[[], Awaitable[T]]) -> T:
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Marks the exception as retrieved when every caller was cancelled before it came
+            task.exception()
+
+
+if __name__ == "__main__":
+    # Ten concurrent callers for one key run the work once, a failure reaches all of them
+    async def demo() -> None:
+        flights = SingleFlight()
+        runs = 0
+
+        async def work() -> str:
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.05)
+            return "page"
+
+        results = await asyncio.gather(*(flights.run("url", work) for _ in range(10)))
+        assert results == ["page"] * 10 and runs == 1
+
+        async def failing() -> str:
+            await asyncio.sleep(0.05)
+            raise RuntimeError("scrape failed")
+
+        results = await asyncio.gather(
+            *(flights.run("url", failing) for _ in range(10)), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        print(f"10 + 10 callers, {flights.coalesced} coalesced")
+
+    asyncio.run(demo())
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from backend.app.utils.single_flight import SingleFlight
+from backend.app.utils.tiered_cache import TieredCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RevalidationStats:
+    fresh: int = 0
+    stale: int = 0
+    misses: int = 0
+    refresh_failures: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class StaleWhileRevalidateCache:
+    """Entries with a soft and a hard TTL. Before the soft TTL an entry is served as it is, between the two it is
+    served right away while a refresh runs in the background, after the hard TTL (the TTL of the underlying
+    cache) it is gone and the caller waits for the fetch. Concurrent fetches of one key run once.
+
+    A failed background refresh keeps serving the stale value until the hard TTL"""
+
+    def __init__(
+        self,
+        cache: TieredCache,
+        soft_ttl: float,
+        flights: SingleFlight | None = None,
+    ) -> None:
+        self.cache = cache
+        self.soft_ttl = soft_ttl
+        self.flights = flights or SingleFlight()
+        self.stats = RevalidationStats()
+        self._refreshing: set[asyncio.Task] = set()
+
+    async def get(
+        self, key: str, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:  # noqa: ANN401
+        entry = await self.cache.aget(key)
+        # A value the cache held before it was revalidating, e.g. a plain string from an older version of the
+        # persistent tier, is refetched like a missing one
+        if not isinstance(entry, dict) or "fresh_until" not in entry:
+            self.stats.misses += 1
+            return await self.flights.run(key, lambda: self._fetch(key, fetch))
+
+        if entry["fresh_until"] > time.time():
+            self.stats.fresh += 1
+        else:
+            self.stats.stale += 1
+            self._refresh_in_background(key, fetch)
+        return entry["value"]
+
+    async def _fetch(
+        self, key: str, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:  # noqa: ANN401
+        value = await fetch()
+        self.cache.set(
+            key, {"value": value, "fresh_until": time.time() + self.soft_ttl}
+        )
+        return value
+
+    def _refresh_in_background(
+        self, key: str, fetch: Callable[[], Awaitable[Any]]
+    ) -> None:
+        async def refresh() -> None:
+            try:
+                await self.flights.run(key, lambda: self._fetch(key, fetch))
+            except Exception:
+                self.stats.refresh_failures += 1
+                logger.exception("Refreshing %s failed, serving the stale value", key)
+
+        # Kept referenced until done, the loop only holds weak references to tasks
+        task = asyncio.create_task(refresh())
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+
+if __name__ == "__main__":
+    # A stale entry is served immediately and refreshed once in the background, however many callers see it
+    async def demo() -> None:
+        swr = StaleWhileRevalidateCache(TieredCache(ttl=1.0), soft_ttl=0.1)
+        fetches = 0
+
+        async def fetch() -> int:
+            nonlocal fetches
+            fetches += 1
+            await asyncio.sleep(0.05)
+            return fetches
+
+        assert await swr.get("page", fetch) == 1
+        await asyncio.sleep(0.15)
+        start_time = time.perf_counter()
+        stale = await asyncio.gather(*(swr.get("page", fetch) for _ in range(10)))
+        waited = time.perf_counter() - start_time
+        assert stale == [1] * 10 and waited < 0.05
+        await asyncio.sleep(0.1)
+        assert await swr.get("page", fetch) == 2 and fetches == 2
+        print(f"10 stale reads in {waited * 1000:.1f} ms, {swr.stats.as_dict()}")
+
+    asyncio.run(demo())
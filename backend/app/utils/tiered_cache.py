@@ -0,0 +1,265 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Marks a pending delete among the pending writes
+DELETED = object()
+# Neither in memory nor queued, only the file can tell
+UNKNOWN = object()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    disk_writes: int = 0
+    disk_commits: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {**asdict(self), "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+class TieredCache:
+    """Bounded in-memory LRU in front of an optional SQLite file, so entries survive restarts when `path` is set.
+    Values have to be JSON serializable, on disk they are stored zlib-compressed.
+
+    Writes to the file are behind the memory tier: `set` and `delete` only queue them, a writer thread stores
+    everything queued in one transaction and removes expired rows every `sweep_interval` seconds. Lookups read
+    the queued writes first, the file is in WAL mode so they never wait for a commit. `close` stores the rest.
+
+    Async code looks entries up with `aget`, which reads the file in a worker thread. `get` reads it on the
+    calling thread
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600,
+        path: str | None = None,
+        table: str = "cache",
+        sweep_interval: float = 300,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.table = table
+        self.sweep_interval = sweep_interval
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Reads of the file, not under _lock so memory lookups do not wait for them
+        self._db_lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        # Queued writes, and the ones the writer is storing right now
+        self._pending: dict[str, tuple[float, Any]] = {}
+        self._storing: dict[str, tuple[float, Any]] = {}
+        self._wake = threading.Event()
+        self._closing = False
+        self._writer: threading.Thread | None = None
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # Several caches may share the file, a writer waits for the others' transactions
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value BLOB NOT NULL)"
+            )
+            self._db.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_expires_at ON {table} (expires_at)"
+            )
+            self._db.commit()
+            self._writer = threading.Thread(
+                target=self._write_behind,
+                args=(path,),
+                name=f"cache-{table}",
+                daemon=True,
+            )
+            self._writer.start()
+
+    def get(self, key: str) -> Any | None:  # noqa: ANN401
+        value = self._get_cached(key)
+        return self._get_stored(key) if value is UNKNOWN else value
+
+    async def aget(self, key: str) -> Any | None:  # noqa: ANN401
+        """get() for the event loop, the file is read in a worker thread"""
+        value = self._get_cached(key)
+        if value is UNKNOWN:
+            return await asyncio.to_thread(self._get_stored, key)
+        return value
+
+    def set(self, key: str, value: object, ttl: float | None = None) -> None:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, expires_at, value)
+            if self._db is not None:
+                self._pending[key] = (expires_at, value)
+                self._wake.set()
+
+    def warm(self, limit: int | None = None) -> int:
+        """Load the most recently stored entries from disk into memory, so they are served from memory right
+        after a restart. Returns how many were loaded"""
+        if self._db is None:
+            return 0
+
+        limit = self.max_entries if limit is None else min(limit, self.max_entries)
+        with self._db_lock:
+            rows = self._db.execute(
+                f"SELECT key, expires_at, value FROM {self.table} WHERE expires_at > ? "
+                "ORDER BY expires_at DESC LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+        with self._lock:
+            # Oldest first, so the newest end up as the most recently used
+            for key, expires_at, value in reversed(rows):
+                self._remember(key, expires_at, json.loads(zlib.decompress(value)))
+        return len(rows)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                self._pending[key] = (0.0, DELETED)
+                self._wake.set()
+
+    def close(self) -> None:
+        """Store the queued writes and close the file"""
+        with self._lock:
+            if self._db is None:
+                return
+            self._closing = True
+        self._wake.set()
+        self._writer.join()
+        with self._db_lock, self._lock:
+            self._db.close()
+            self._db = None
+
+    def _get_cached(self, key: str) -> Any | None:  # noqa: ANN401
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats.hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is None:
+                self.stats.misses += 1
+                return None
+
+            # Queued writes are newer than the file, an evicted entry may not be stored yet
+            entry = self._pending.get(key) or self._storing.get(key)
+            if entry is None:
+                return UNKNOWN
+            expires_at, value = entry
+            if value is DELETED or expires_at <= now:
+                self.stats.misses += 1
+                return None
+            self._remember(key, expires_at, value)
+            self.stats.hits += 1
+            self.stats.disk_hits += 1
+            return value
+
+    def _get_stored(self, key: str) -> Any | None:  # noqa: ANN401
+        with self._db_lock:
+            row = None
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT expires_at, value FROM {self.table} WHERE key = ?",
+                    (key,),
+                ).fetchone()
+
+        with self._lock:
+            if row is None or row[0] <= time.time():
+                self.stats.misses += 1
+                return None
+            value = json.loads(zlib.decompress(row[1]))
+            # A set() while the file was read is newer than the row
+            if not (
+                key in self._memory or key in self._pending or key in self._storing
+            ):
+                self._remember(key, row[0], value)
+            self.stats.hits += 1
+            self.stats.disk_hits += 1
+            return value
+
+    def _remember(self, key: str, expires_at: float, value: object) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _write_behind(self, path: str) -> None:
+        # Its own connection, committing on it does not hold up the lookups on the other one
+        db = sqlite3.connect(path, timeout=30)
+        next_sweep = time.monotonic()
+        try:
+            while True:
+                self._wake.wait(timeout=self.sweep_interval)
+                self._wake.clear()
+                with self._lock:
+                    pending = self._storing = self._pending
+                    self._pending = {}
+                    closing = self._closing
+                sweep = time.monotonic() >= next_sweep
+                if pending or sweep:
+                    try:
+                        self._store(db, pending, sweep)
+                    except Exception:
+                        # The entries stay in memory, only their copy on disk is lost
+                        logger.exception(
+                            "Failed to store %d entries in %s", len(pending), self.table
+                        )
+                with self._lock:
+                    self._storing = {}
+                if sweep:
+                    next_sweep = time.monotonic() + self.sweep_interval
+                if closing:
+                    return
+        finally:
+            db.close()
+
+    def _store(
+        self, db: sqlite3.Connection, pending: dict[str, tuple[float, Any]], sweep: bool
+    ) -> None:
+        rows, deleted = [], []
+        for key, (expires_at, value) in pending.items():
+            if value is DELETED:
+                deleted.append((key,))
+                continue
+            try:
+                rows.append(
+                    (key, expires_at, zlib.compress(json.dumps(value).encode()))
+                )
+            except (TypeError, ValueError):
+                logger.warning(
+                    "Not storing %s in %s, it is not JSON serializable", key, self.table
+                )
+        with db:
+            db.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, expires_at, value) VALUES (?, ?, ?)",
+                rows,
+            )
+            db.executemany(f"DELETE FROM {self.table} WHERE key = ?", deleted)
+            if sweep:
+                db.execute(
+                    f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)
+                )
+        with self._lock:
+            self.stats.disk_writes += len(pending)
+            self.stats.disk_commits += 1